@@ -1,6 +1,9 @@
 from datetime import datetime, timedelta
 from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import os
+import time
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
@@ -8,6 +11,9 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from backend.database import SessionLocal
 from backend.models import User
+from backend.auth_cache import token_cache
+from backend.metrics import LatencyWindow
+from backend.settings import PASSWORD_HASH_MAX_PENDING, PASSWORD_HASH_WORKERS
 
 
 def get_db():
@@ -44,6 +50,64 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+class PasswordHasher:
+    """
+    Password verification for the login endpoint, off the event loop and the
+    request threadpool: bcrypt runs on a small dedicated thread pool (bcrypt
+    releases the GIL), and at most max_pending verifications may wait for it.
+    Queue time and hash time are recorded for /internal/metrics.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._pending = 0  # only touched on the event loop thread
+        self.queue_ms = LatencyWindow()
+        self.hash_ms = LatencyWindow()
+        self.verified = 0
+        self.rejected = 0
+
+    def _verify(self, plain_password: str, hashed_password: str, submitted: float) -> bool:
+        started = time.perf_counter()
+        self.queue_ms.add((started - submitted) * 1000)
+        try:
+            return verify_password(plain_password, hashed_password)
+        finally:
+            self.hash_ms.add((time.perf_counter() - started) * 1000)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many logins in progress, try again shortly",
+                headers={"Retry-After": "1"},
+            )
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._verify, plain_password, hashed_password, time.perf_counter(),
+            )
+        finally:
+            self._pending -= 1
+            self.verified += 1
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "verified": self.verified,
+            "rejected": self.rejected,
+            "queue_ms": self.queue_ms.summary(),
+            "hash_ms": self.hash_ms.summary(),
+        }
+
+
+password_hasher = PasswordHasher()
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -64,8 +128,14 @@ def get_current_user(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    token = credentials.credentials
+    cached = token_cache.get(token)
+    if cached is not None:
+        # Verified before: a detached snapshot, no JWT decode or user query
+        user_id, username, is_active = cached
+        return User(id=user_id, username=username, is_active=is_active)
+
     try:
-        token = credentials.credentials
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
@@ -76,6 +146,7 @@ def get_current_user(
     user = db.query(User).filter(User.username == username).first()
     if user is None or user.is_active != 1:
         raise credentials_exception
+    token_cache.put(token, user, payload.get("exp"))
     return user
 
 
@@ -0,0 +1,125 @@
+"""
+Cache of verified access tokens -> user snapshot.
+
+Every authenticated request used to decode the JWT (HMAC check) and look the
+user up by username. Score entry sends the same token over and over, so the
+outcome is kept in a small LRU cache with a TTL, keyed on the SHA-256 of the
+token (raw tokens are never kept). Entries never outlive the token's own
+expiry.
+
+Changes to users made through the ORM in this process (is_active changes,
+deletes) drop that user's entries right away. Changes made by another process,
+such as `python -m backend.delete_user`, are only picked up when the entries
+expire, so AUTH_CACHE_TTL_SECONDS bounds how long a deleted or deactivated
+user keeps access to a running server.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from sqlalchemy import event
+
+from backend.models import User
+from backend.settings import AUTH_CACHE_SIZE, AUTH_CACHE_TTL_SECONDS
+
+
+class TokenCache:
+    def __init__(self, max_entries: int = AUTH_CACHE_SIZE, ttl_seconds: int = AUTH_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # token hash -> (expires_at, user_id, username, is_active)
+        self._by_user = {}             # user_id -> {token hash}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def _remove(self, key: str):
+        _, user_id, _, _ = self._entries.pop(key)
+        keys = self._by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[user_id]
+
+    def get(self, token: str) -> Optional[Tuple[int, str, int]]:
+        """(user_id, username, is_active) for a token verified earlier, None on a miss."""
+        if not self.enabled:
+            return None
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1:]
+
+    def put(self, token: str, user: User, token_expires_at: Optional[float]):
+        """Remember a verified token; token_expires_at is the JWT "exp" (unix time)."""
+        if not self.enabled:
+            return
+        ttl = self.ttl_seconds
+        if token_expires_at is not None:
+            ttl = min(ttl, token_expires_at - time.time())
+        if ttl <= 0:
+            return
+        key = self._key(token)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, user.id, user.username, user.is_active)
+            self._by_user.setdefault(user.id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: int):
+        with self._lock:
+            for key in list(self._by_user.get(user_id, ())):
+                self._remove(key)
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+token_cache = TokenCache()
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_changed(mapper, connection, target):
+    token_cache.invalidate_user(target.id)
@@ -0,0 +1,174 @@
+"""
+Query benchmark for the hot query shapes, without and with the composite indexes.
+
+Builds a synthetic SQLite database in a temporary file (it never touches the
+configured DATABASE_URL): full schedules for every tournament, group matches
+scored. Runs the queries the app issues most, first without the indexes added
+by migration 2, then after applying them, and prints each query's plan and
+median latency.
+Usage:
+    python -m backend.benchmark
+    python -m backend.benchmark <tournaments> <teams_per_tournament>
+    python -m backend.benchmark 50 24
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import sessionmaker
+
+from backend import planner
+from backend.database import Base, make_engine
+from backend.migrations import create_indexes
+from backend.models import Match, Poule, Round, Sponsor, Team, Tournament
+from backend.schedule import _persist_plan
+
+INDEXED_MODELS = (Poule, Team, Round, Match, Sponsor)
+REPEAT = 200
+
+
+def _build(bind, num_tournaments: int, teams_per_tournament: int, num_poules: int = 4):
+    Session = sessionmaker(bind=bind)
+    db = Session()
+    rng = random.Random(1)
+    settings = planner.ScheduleSettings(num_fields=4, match_duration_minutes=10,
+                                        break_duration_minutes=2, start_time="09:00")
+    try:
+        for t in range(num_tournaments):
+            tournament = Tournament(name=f"Toernooi {t + 1}", start_time="09:00", num_fields=4,
+                                    match_duration_minutes=10, break_duration_minutes=2)
+            db.add(tournament)
+            db.flush()
+            poules = [Poule(name=chr(ord("A") + i), tournament_id=tournament.id) for i in range(num_poules)]
+            db.add_all(poules)
+            db.flush()
+            teams = [
+                Team(name=f"Team {i + 1}", tournament_id=tournament.id, poule_id=poules[i % num_poules].id)
+                for i in range(teams_per_tournament)
+            ]
+            db.add_all(teams)
+            db.add_all(Sponsor(tournament_id=tournament.id, logo_filename=f"logo{i}.png", order=i) for i in range(5))
+            db.commit()
+
+            specs = [
+                planner.PouleSpec(id=p.id, team_ids=tuple(tm.id for tm in teams if tm.poule_id == p.id))
+                for p in poules
+            ]
+            _persist_plan(db, tournament.id, planner.plan_schedule(specs, settings))
+
+        group_match_ids = [mid for (mid,) in db.query(Match.id).filter(Match.poule_id.isnot(None)).all()]
+        db.execute(update(Match), [
+            {
+                "id": mid,
+                "home_set1_score": rng.randint(5, 21), "away_set1_score": rng.randint(5, 21),
+                "home_set2_score": rng.randint(5, 21), "away_set2_score": rng.randint(5, 21),
+            }
+            for mid in group_match_ids
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def _queries(tournament_id: int, poule_id: int):
+    """The query shapes behind standings, schedule, bracket, phase status and sponsors."""
+    return [
+        ("standings: poule matches of a tournament",
+         select(Match.id, Match.poule_id, Match.home_team_id, Match.away_team_id,
+                Match.home_set1_score, Match.away_set1_score,
+                Match.home_set2_score, Match.away_set2_score)
+         .where(Match.tournament_id == tournament_id, Match.poule_id.isnot(None))),
+        ("score submit: is the poule complete",
+         select(Match.home_set1_score, Match.away_set1_score, Match.home_set2_score, Match.away_set2_score)
+         .where(Match.poule_id == poule_id)),
+        ("schedule: rounds in order",
+         select(Round).where(Round.tournament_id == tournament_id).order_by(Round.round_number)),
+        ("schedule: all matches of a tournament",
+         select(Match.id, Match.round_id, Match.field_number)
+         .join(Round, Match.round_id == Round.id)
+         .where(Round.tournament_id == tournament_id)
+         .order_by(Match.id)),
+        ("bracket: knockout and final matches",
+         select(Match.id, Round.round_number, Match.home_winner_of_id, Match.away_winner_of_id)
+         .join(Round, Match.round_id == Round.id)
+         .where(Round.tournament_id == tournament_id, Round.type.in_(["knockout", "final"]))),
+        ("phase status: first knockout round",
+         select(Round.id).where(Round.tournament_id == tournament_id, Round.type == "knockout").limit(1)),
+        ("standings: teams in poules",
+         select(Team.id, Team.name, Team.poule_id)
+         .where(Team.tournament_id == tournament_id, Team.poule_id.isnot(None))
+         .order_by(Team.id)),
+        ("sponsors of a tournament",
+         select(Sponsor.id).where(Sponsor.tournament_id == tournament_id).order_by(Sponsor.order, Sponsor.id)),
+    ]
+
+
+def _measure(bind, queries):
+    results = []
+    with bind.connect() as conn:
+        for name, stmt in queries:
+            sql = str(stmt.compile(dialect=bind.dialect, compile_kwargs={"literal_binds": True}))
+            plan = [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+            conn.execute(stmt).fetchall()  # warm up
+            timings = []
+            for _ in range(REPEAT):
+                start = time.perf_counter()
+                conn.execute(stmt).fetchall()
+                timings.append((time.perf_counter() - start) * 1000)
+            results.append((name, statistics.median(timings), plan))
+    return results
+
+
+def run_benchmark(num_tournaments: int = 50, teams_per_tournament: int = 24):
+    path = os.path.join(tempfile.mkdtemp(), "benchmark.db")
+    bind = make_engine(f"sqlite:///{path}")
+    try:
+        print(f"Building {num_tournaments} tournaments x {teams_per_tournament} teams in {path} ...")
+        Base.metadata.create_all(bind=bind)
+        # Start from the schema before migration 2: only the single-column id/username indexes
+        with bind.begin() as conn:
+            for model in INDEXED_MODELS:
+                for index in model.__table__.indexes:
+                    if not any(column.index for column in index.columns):
+                        index.drop(conn)
+        _build(bind, num_tournaments, teams_per_tournament)
+
+        with bind.connect() as conn:
+            tournament_id = conn.execute(select(Tournament.id).order_by(Tournament.id.desc()).limit(1)).scalar()
+            poule_id = conn.execute(select(Poule.id).where(Poule.tournament_id == tournament_id).limit(1)).scalar()
+            match_count = conn.execute(select(Match.id)).all()
+        print(f"{len(match_count)} matches; measuring tournament {tournament_id}, median of {REPEAT} runs\n")
+
+        queries = _queries(tournament_id, poule_id)
+        before = _measure(bind, queries)
+        with bind.begin() as conn:
+            for model in INDEXED_MODELS:
+                create_indexes(conn, model)
+            conn.exec_driver_sql("ANALYZE")
+        after = _measure(bind, queries)
+
+        for (name, before_ms, before_plan), (_, after_ms, after_plan) in zip(before, after):
+            speedup = before_ms / after_ms if after_ms else float("inf")
+            print(f"{name}")
+            print(f"  before: {before_ms:8.3f} ms   {' | '.join(before_plan)}")
+            print(f"  after:  {after_ms:8.3f} ms   {' | '.join(after_plan)}")
+            print(f"  {speedup:.1f}x\n")
+    finally:
+        bind.dispose()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (1, 3):
+        print("Usage: python -m backend.benchmark [<tournaments> <teams_per_tournament>]")
+        print("Example: python -m backend.benchmark 50 24")
+        sys.exit(1)
+
+    if len(sys.argv) == 3:
+        run_benchmark(int(sys.argv[1]), int(sys.argv[2]))
+    else:
+        run_benchmark()
@@ -0,0 +1,185 @@
+"""
+Knockout dependency graph.
+
+Built from a tournament's persisted knockout and final matches. Each match side
+comes either from a poule rank (home_rank_poule_id / home_rank_position) or from
+the winner of an earlier match (home_winner_of_id). Two indexes are kept: poule ->
+matches seeded from it, and match -> matches taking its winner. Resolving teams
+is then a single pass over the matches in round order, since a match is always
+planned after the matches it depends on.
+
+Graphs are cached per tournament; score writes only revisit the matches
+downstream of what changed.
+"""
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from backend import planner
+from backend.models import Match, Round
+from backend.standings import is_played
+
+
+@dataclass
+class BracketNode:
+    match_id: int
+    round_number: int
+    home_rank: Optional[Tuple[int, int]]  # (poule_id, position)
+    away_rank: Optional[Tuple[int, int]]
+    home_winner_of: Optional[int]         # match id
+    away_winner_of: Optional[int]
+    home_team_id: Optional[int]
+    away_team_id: Optional[int]
+    scores: Tuple                         # (home_set1, away_set1, home_set2, away_set2)
+
+
+class BracketGraph:
+    def __init__(self, nodes: Sequence[BracketNode]):
+        self.nodes = {n.match_id: n for n in nodes}
+        self.order = [n.match_id for n in sorted(nodes, key=lambda n: (n.round_number, n.match_id))]
+        self.by_poule = {}     # poule_id -> [match_id] seeded from that poule
+        self.dependents = {}   # match_id -> [match_id] taking its winner
+        for n in nodes:
+            for rank in (n.home_rank, n.away_rank):
+                if rank:
+                    self.by_poule.setdefault(rank[0], []).append(n.match_id)
+            for feeder in (n.home_winner_of, n.away_winner_of):
+                if feeder:
+                    self.dependents.setdefault(feeder, []).append(n.match_id)
+
+    def winner(self, match_id: int) -> Optional[int]:
+        """Team id of the winner of a played match, None if not played, undecided or unknown."""
+        node = self.nodes.get(match_id)
+        if node is None or not node.home_team_id or not node.away_team_id or not is_played(*node.scores):
+            return None
+        side = planner.match_winner(*node.scores)
+        if side == "home":
+            return node.home_team_id
+        if side == "away":
+            return node.away_team_id
+        return None
+
+    def _side(self, rank, winner_of, rankings, current) -> Optional[int]:
+        """
+        Team for one side of a match; None if its rank or feeder match is undecided.
+        Sides without a link, and rank sides of poules missing from `rankings`, keep `current`.
+        """
+        if rank:
+            poule_id, position = rank
+            if poule_id not in rankings:
+                return current
+            ranking = rankings[poule_id]
+            return ranking[position - 1] if position <= len(ranking) else None
+        if winner_of:
+            return self.winner(winner_of)
+        return current
+
+    def downstream(self, match_ids: Iterable[int]) -> set:
+        """The given matches plus every match that (indirectly) takes a winner from them."""
+        seen = set()
+        stack = [mid for mid in match_ids if mid in self.nodes]
+        while stack:
+            match_id = stack.pop()
+            if match_id not in seen:
+                seen.add(match_id)
+                stack.extend(self.dependents.get(match_id, ()))
+        return seen
+
+    def resolve(self, rankings: Dict[int, List[int]],
+                start: Optional[Iterable[int]] = None) -> Dict[int, Tuple[Optional[int], Optional[int]]]:
+        """
+        Fill match sides from poule rankings ({poule_id: [team_id, ...] in rank order})
+        and winners of earlier matches. A side whose seed or feeder match is no longer
+        decided is cleared; poules missing from `rankings` are left as they are. With
+        `start`, only those matches and everything downstream of them are visited. Returns {match_id: (home_team_id, away_team_id)} for every
+        match whose teams changed; the nodes are updated in place.
+        """
+        visit = None if start is None else self.downstream(start)
+        changes = {}
+        for match_id in self.order:
+            if visit is not None and match_id not in visit:
+                continue
+            node = self.nodes[match_id]
+            home = self._side(node.home_rank, node.home_winner_of, rankings, node.home_team_id)
+            away = self._side(node.away_rank, node.away_winner_of, rankings, node.away_team_id)
+            if (home, away) != (node.home_team_id, node.away_team_id):
+                node.home_team_id, node.away_team_id = home, away
+                changes[match_id] = (home, away)
+        return changes
+
+
+class BracketEngine:
+    """Per-tournament bracket graphs, loaded once and kept in step with score writes."""
+
+    def __init__(self):
+        self._graphs = {}
+        self._generation = {}  # tournament_id -> bumped on every invalidation
+        self._tournament_locks = {}
+        self.lock = threading.Lock()  # held while a graph is read or updated
+
+    @staticmethod
+    def _load(db: Session, tournament_id: int) -> BracketGraph:
+        rows = (
+            db.query(
+                Match.id, Round.round_number,
+                Match.home_rank_poule_id, Match.home_rank_position,
+                Match.away_rank_poule_id, Match.away_rank_position,
+                Match.home_winner_of_id, Match.away_winner_of_id,
+                Match.home_team_id, Match.away_team_id,
+                Match.home_set1_score, Match.away_set1_score,
+                Match.home_set2_score, Match.away_set2_score,
+            )
+            .join(Round, Match.round_id == Round.id)
+            .filter(Round.tournament_id == tournament_id, Round.type.in_(["knockout", "final"]))
+            .all()
+        )
+        return BracketGraph([
+            BracketNode(
+                match_id=match_id,
+                round_number=round_number,
+                home_rank=(home_poule, home_position) if home_poule and home_position else None,
+                away_rank=(away_poule, away_position) if away_poule and away_position else None,
+                home_winner_of=home_winner_of,
+                away_winner_of=away_winner_of,
+                home_team_id=home_id,
+                away_team_id=away_id,
+                scores=(h1, a1, h2, a2),
+            )
+            for (
+                match_id, round_number,
+                home_poule, home_position, away_poule, away_position,
+                home_winner_of, away_winner_of, home_id, away_id,
+                h1, a1, h2, a2,
+            ) in rows
+        ])
+
+    def get(self, db: Session, tournament_id: int) -> BracketGraph:
+        with self.lock:
+            graph = self._graphs.get(tournament_id)
+            if graph is not None:
+                return graph
+            generation = self._generation.get(tournament_id, 0)
+        graph = self._load(db, tournament_id)
+        with self.lock:
+            # Only cache the graph if it wasn't invalidated while loading
+            if self._generation.get(tournament_id, 0) == generation:
+                graph = self._graphs.setdefault(tournament_id, graph)
+        return graph
+
+    def tournament_lock(self, tournament_id: int) -> threading.Lock:
+        """
+        Held from resolving a tournament's knockout teams until they are committed,
+        so concurrent resolves write in the order they saw the graph.
+        """
+        with self.lock:
+            return self._tournament_locks.setdefault(tournament_id, threading.Lock())
+
+    def invalidate(self, tournament_id: int):
+        with self.lock:
+            self._graphs.pop(tournament_id, None)
+            self._generation[tournament_id] = self._generation.get(tournament_id, 0) + 1
+
+
+bracket_engine = BracketEngine()
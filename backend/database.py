@@ -1,28 +1,120 @@
 from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy.engine import Engine
-import sqlite3
 
-from backend.settings import DATABASE_URL
-
-
-engine = create_engine(
+from backend.metrics import MeteredAsyncQueuePool, MeteredQueuePool
+from backend.settings import (
     DATABASE_URL,
-    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_STATEMENT_TIMEOUT_MS,
+    SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_CACHE_SIZE_KB,
+    SQLITE_MMAP_SIZE,
+    SQLITE_PROFILE,
 )
 
-@event.listens_for(Engine, "connect")
-def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
-    if isinstance(dbapi_connection, sqlite3.Connection):
+SQLITE_PROFILES = ("default", "wal")
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+
+def sqlite_pragmas(profile: str = SQLITE_PROFILE) -> list:
+    """PRAGMA statements run on every new SQLite connection for a profile."""
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown SQLITE_PROFILE {profile!r}, expected one of {', '.join(SQLITE_PROFILES)}")
+    pragmas = ["foreign_keys=ON"]
+    if profile == "wal":
+        pragmas += [
+            "journal_mode=WAL",        # persistent in the file; readers no longer wait for the writer
+            "synchronous=NORMAL",      # fsync at checkpoints instead of every commit; safe with WAL
+            f"busy_timeout={SQLITE_BUSY_TIMEOUT_MS}",
+            f"mmap_size={SQLITE_MMAP_SIZE}",
+            f"cache_size=-{SQLITE_CACHE_SIZE_KB}",  # negative: KiB instead of pages
+            "temp_store=MEMORY",
+        ]
+    return pragmas
+
+
+def _engine_options(url, is_async: bool) -> dict:
+    backend = url.get_backend_name()
+    pool_args = {
+        "poolclass": MeteredAsyncQueuePool if is_async else MeteredQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+    }
+    if backend == "sqlite":
+        options = {"connect_args": {"check_same_thread": False}}
+        if url.database in (None, "", ":memory:"):
+            return options  # in-memory databases keep SQLAlchemy's own pool
+        return {**options, **pool_args}
+
+    connect_args = {}
+    if backend == "postgresql" and DB_STATEMENT_TIMEOUT_MS > 0:
+        if is_async:
+            connect_args["server_settings"] = {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+        else:
+            connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+    return {
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "connect_args": connect_args,
+        **pool_args,
+    }
+
+
+def _add_sqlite_pragmas(bind, profile: str):
+    pragmas = sqlite_pragmas(profile)
+
+    @event.listens_for(bind, "connect")
+    def apply_sqlite_pragmas(dbapi_connection, connection_record):
         cursor = dbapi_connection.cursor()
-        cursor.execute("PRAGMA foreign_keys=ON")
+        for pragma in pragmas:
+            cursor.execute(f"PRAGMA {pragma}")
         cursor.close()
 
+
+def make_engine(url: str = DATABASE_URL, sqlite_profile: str = SQLITE_PROFILE):
+    parsed = make_url(url)
+    bind = create_engine(parsed, **_engine_options(parsed, is_async=False))
+    if parsed.get_backend_name() == "sqlite":
+        _add_sqlite_pragmas(bind, sqlite_profile)
+    return bind
+
+
+def make_async_engine(url: str = DATABASE_URL, sqlite_profile: str = SQLITE_PROFILE):
+    """The same database through its asyncio driver (aiosqlite / asyncpg)."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend!r} databases")
+    parsed = parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+    bind = create_async_engine(parsed, **_engine_options(parsed, is_async=True))
+    if backend == "sqlite":
+        _add_sqlite_pragmas(bind.sync_engine, sqlite_profile)
+    return bind
+
+
+engine = make_engine()
+
 SessionLocal = sessionmaker(
     autocommit=False, 
     autoflush=False, 
     bind=engine
     )
 
+# Async engine for the read-heavy public endpoints; same database, same pool settings
+async_engine = make_async_engine()
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 Base = declarative_base()
 
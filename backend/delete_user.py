@@ -7,6 +7,7 @@ Usage:
 import sys
 from backend.database import SessionLocal
 from backend.models import User
+from backend.settings import AUTH_CACHE_TTL_SECONDS
 
 
 def delete_user(username: str):
@@ -33,6 +34,7 @@ def delete_user(username: str):
         db.delete(user)
         db.commit()
         print(f"✓ User '{username}' deleted successfully.")
+        print(f"  A running server accepts this user's existing tokens for at most {AUTH_CACHE_TTL_SECONDS}s more.")
     except Exception as e:
         print(f"Error deleting user: {e}")
         db.rollback()
@@ -0,0 +1,81 @@
+"""
+In-process publish/subscribe hub for the live tournament feed (Server-Sent Events).
+
+Each subscriber is a small bounded asyncio.Queue, so idle spectators cost
+next to nothing. Endpoints publish after their commit; sync endpoints run in
+the threadpool, so publishing hops onto the event loop thread-safely.
+"""
+import asyncio
+import json
+import threading
+from typing import Optional
+
+QUEUE_SIZE = 100
+KEEPALIVE_SECONDS = 15
+
+
+class EventHub:
+    def __init__(self):
+        self._subscribers = {}  # tournament_id -> set of asyncio.Queue
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def subscribe(self, tournament_id: int) -> asyncio.Queue:
+        self._loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(tournament_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, tournament_id: int, queue: asyncio.Queue):
+        with self._lock:
+            queues = self._subscribers.get(tournament_id)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[tournament_id]
+
+    def subscriber_count(self, tournament_id: int) -> int:
+        return len(self._subscribers.get(tournament_id, ()))
+
+    def publish(self, tournament_id: int, event_type: str, data: dict):
+        """Send an event to every subscriber of a tournament. Safe to call from any thread."""
+        if not self._subscribers.get(tournament_id) or self._loop is None:
+            return
+        message = f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._fan_out(tournament_id, message)
+        else:
+            self._loop.call_soon_threadsafe(self._fan_out, tournament_id, message)
+
+    def _fan_out(self, tournament_id: int, message: str):
+        with self._lock:
+            queues = list(self._subscribers.get(tournament_id, ()))
+        for queue in queues:
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Slow client: drop its backlog and tell it to reload everything
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait("event: resync\ndata: {}\n\n")
+
+    async def stream(self, tournament_id: int):
+        """Async generator of SSE messages for one subscriber, with keep-alive comments."""
+        queue = self.subscribe(tournament_id)
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+        finally:
+            self.unsubscribe(tournament_id, queue)
+
+
+event_hub = EventHub()
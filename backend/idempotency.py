@@ -0,0 +1,91 @@
+"""
+Idempotency keys for score submission.
+
+Score entry runs on venue Wi-Fi, so a client may resend a request whose
+response it never saw. A request carrying an `Idempotency-Key` header is
+remembered here together with its response: a retry with the same key gets
+that response back instead of running the write again. Keys are scoped per
+user and endpoint, and a key reused with a different body is refused.
+
+Only successful responses are stored; a failed request releases its key, so
+it can be retried as is. Entries live in process memory, bounded in number
+and age (IDEMPOTENCY_MAX_KEYS, IDEMPOTENCY_TTL_SECONDS).
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from backend.settings import IDEMPOTENCY_MAX_KEYS, IDEMPOTENCY_TTL_SECONDS
+
+NEW = "new"                  # run the request, then complete() or release()
+REPLAY = "replay"            # finished before: return the stored response
+IN_PROGRESS = "in_progress"  # the same key is being processed right now
+MISMATCH = "mismatch"        # the key was used before for a different request
+
+
+def fingerprint(payload: Any) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class IdempotencyStore:
+    def __init__(self, max_entries: int = IDEMPOTENCY_MAX_KEYS, ttl_seconds: int = IDEMPOTENCY_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._done = OrderedDict()  # key -> (expires_at, fingerprint, response), oldest first
+        self._pending = {}          # key -> fingerprint of the request being processed
+        self._lock = threading.Lock()
+        self.replays = 0
+        self.rejected = 0
+        self.evictions = 0
+
+    def begin(self, key, request_fingerprint: str) -> Tuple[str, Optional[Any]]:
+        """(NEW, None), (REPLAY, stored response), (IN_PROGRESS, None) or (MISMATCH, None)."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._done.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._done[key]
+                entry = None
+            if entry is not None:
+                if entry[1] != request_fingerprint:
+                    self.rejected += 1
+                    return MISMATCH, None
+                self.replays += 1
+                return REPLAY, entry[2]
+            if key in self._pending:
+                self.rejected += 1
+                return IN_PROGRESS if self._pending[key] == request_fingerprint else MISMATCH, None
+            self._pending[key] = request_fingerprint
+            return NEW, None
+
+    def complete(self, key, response: Any):
+        with self._lock:
+            request_fingerprint = self._pending.pop(key, None)
+            if request_fingerprint is None:
+                return
+            self._done[key] = (time.monotonic() + self.ttl_seconds, request_fingerprint, response)
+            while len(self._done) > self.max_entries:
+                self._done.popitem(last=False)
+                self.evictions += 1
+
+    def release(self, key):
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._done),
+                "in_progress": len(self._pending),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "replays": self.replays,
+                "rejected": self.rejected,
+                "evictions": self.evictions,
+            }
+
+
+idempotency_store = IdempotencyStore()
@@ -0,0 +1,66 @@
+"""
+Resized WebP variants of sponsor logos.
+
+The sponsor carousel shows logos 80-96px high, but uploads are stored as-is,
+multi-megabyte PNGs included. After an upload the original is decoded once and
+re-encoded as WebP at a few display heights (1x/2x/4x of the carousel), which
+clients pick from with srcset. Decoding and encoding is CPU work, so it runs on
+a single dedicated worker thread instead of the request threadpool or the
+event loop.
+"""
+import asyncio
+import io
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Tuple
+
+from PIL import Image, ImageOps
+
+VARIANT_HEIGHTS = (96, 192, 384)
+WEBP_QUALITY = 82
+PROCESSABLE_TYPES = {"image/png", "image/jpeg", "image/gif", "image/webp"}  # not SVG
+
+_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="logo-variants")
+
+
+@dataclass(frozen=True)
+class LogoVariant:
+    width: int
+    height: int
+    data: bytes
+
+
+def variant_heights(height: int) -> List[int]:
+    """Target heights below the original, plus the original itself if it is small."""
+    heights = [h for h in VARIANT_HEIGHTS if h < height]
+    if height <= VARIANT_HEIGHTS[-1]:
+        heights.append(height)
+    return heights
+
+
+def make_variants(source) -> Tuple[int, int, List[LogoVariant]]:
+    """
+    Decode an image file object; returns (width, height, variants) of the
+    upright original. Animated images get no variants, so clients keep the
+    animated original.
+    """
+    with Image.open(source) as image:
+        if getattr(image, "is_animated", False):
+            return image.width, image.height, []
+        image = ImageOps.exif_transpose(image)
+        width, height = image.size
+        image = image.convert("RGBA")  # keeps transparency, normalises palette/CMYK images
+
+        variants = []
+        for target in variant_heights(height):
+            size = (max(1, round(width * target / height)), target)
+            resized = image if size == image.size else image.resize(size, Image.LANCZOS)
+            buffer = io.BytesIO()
+            resized.save(buffer, "WEBP", quality=WEBP_QUALITY, method=4)
+            variants.append(LogoVariant(width=size[0], height=size[1], data=buffer.getvalue()))
+        return width, height, variants
+
+
+async def render_variants(source) -> Tuple[int, int, List[LogoVariant]]:
+    """make_variants on the logo worker thread."""
+    return await asyncio.get_running_loop().run_in_executor(_worker, make_variants, source)
@@ -0,0 +1,175 @@
+"""
+Concurrent score-submit load test for the SQLite profiles.
+
+For each SQLITE_PROFILE ("default" and "wal") a fresh SQLite file is built in a
+temporary directory (the configured DATABASE_URL is never touched) with one
+scheduled tournament. Worker threads then submit scores concurrently, each on
+its own connection, doing the database work of POST /matches/{id}/score: load
+the match, write the sets, commit, update the standings and resolve the
+knockout bracket. Meanwhile one reader thread keeps loading the schedule, like
+the public pages do. Prints throughput, latency percentiles and lock errors.
+Usage:
+    python -m backend.loadtest
+    python -m backend.loadtest <threads> <scores_per_thread>
+    python -m backend.loadtest 8 200
+"""
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from backend import schedule
+from backend.bracket import bracket_engine
+from backend.database import SQLITE_PROFILES, Base, make_engine, sqlite_pragmas
+from backend.metrics import pool_status
+from backend.models import Match, Poule, Round, Team, Tournament
+from backend.scores import SCORE_FIELDS, write_score
+from backend.standings import standings_engine
+
+
+def _build(Session, num_teams: int = 24, num_poules: int = 4) -> int:
+    db = Session()
+    try:
+        tournament = Tournament(name="Load test", start_time="09:00", num_fields=4,
+                                match_duration_minutes=10, break_duration_minutes=2)
+        db.add(tournament)
+        db.flush()
+        poules = [Poule(name=chr(ord("A") + i), tournament_id=tournament.id) for i in range(num_poules)]
+        db.add_all(poules)
+        db.flush()
+        teams = [
+            Team(name=f"Team {i + 1}", tournament_id=tournament.id, poule_id=poules[i % num_poules].id)
+            for i in range(num_teams)
+        ]
+        db.add_all(teams)
+        db.commit()
+        schedule.generate_group_phase(db, tournament.id)
+        return tournament.id
+    finally:
+        db.close()
+
+
+def _submit(db, match_id: int, rng: random.Random):
+    """The database work of the submit_score endpoint."""
+    match = db.query(Match).filter(Match.id == match_id).first()
+    write_score(db, match_id, {field: rng.randint(5, 21) for field in SCORE_FIELDS})
+    db.commit()
+    standings_engine.apply_match(match)
+    schedule.resolve_after_score(db, match)
+
+
+def _run_profile(profile: str, num_threads: int, scores_per_thread: int) -> dict:
+    directory = tempfile.mkdtemp()
+    bind = make_engine(f"sqlite:///{os.path.join(directory, 'loadtest.db')}", profile)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=bind)
+    try:
+        Base.metadata.create_all(bind=bind)
+        tournament_id = _build(Session)
+        standings_engine.invalidate(tournament_id)
+        bracket_engine.invalidate(tournament_id)
+        db = Session()
+        match_ids = [mid for (mid,) in db.query(Match.id).filter(Match.tournament_id == tournament_id)]
+        db.close()
+
+        latencies, errors, reads = [], [], [0]
+        record = threading.Lock()
+        stop = threading.Event()
+        start_gate = threading.Barrier(num_threads + 1)
+
+        def writer(seed: int):
+            rng = random.Random(seed)
+            db = Session()
+            start_gate.wait()
+            try:
+                for _ in range(scores_per_thread):
+                    started = time.perf_counter()
+                    try:
+                        _submit(db, rng.choice(match_ids), rng)
+                    except OperationalError as exc:
+                        db.rollback()
+                        with record:
+                            errors.append(str(exc.orig))
+                        continue
+                    with record:
+                        latencies.append((time.perf_counter() - started) * 1000)
+            finally:
+                db.close()
+
+        def reader():
+            db = Session()
+            try:
+                while not stop.is_set():
+                    db.query(Round).filter(Round.tournament_id == tournament_id).order_by(Round.round_number).all()
+                    db.query(Match).filter(Match.tournament_id == tournament_id).all()
+                    db.rollback()
+                    reads[0] += 1
+            except OperationalError as exc:
+                errors.append(f"reader: {exc.orig}")
+            finally:
+                db.close()
+
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(num_threads)]
+        read_thread = threading.Thread(target=reader)
+        for thread in threads:
+            thread.start()
+        read_thread.start()
+        start_gate.wait()
+        started = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        stop.set()
+        read_thread.join()
+
+        standings_engine.invalidate(tournament_id)
+        bracket_engine.invalidate(tournament_id)
+        ordered = sorted(latencies)
+        return {
+            "profile": profile,
+            "submitted": len(latencies),
+            "errors": errors,
+            "elapsed": elapsed,
+            "throughput": len(latencies) / elapsed if elapsed else 0.0,
+            "p50": statistics.median(ordered) if ordered else 0.0,
+            "p95": ordered[int(len(ordered) * 0.95)] if ordered else 0.0,
+            "max": ordered[-1] if ordered else 0.0,
+            "reads": reads[0] / elapsed if elapsed else 0.0,
+            "pool": pool_status(bind),
+        }
+    finally:
+        bind.dispose()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def run_loadtest(num_threads: int = 8, scores_per_thread: int = 200):
+    print(f"{num_threads} writer threads x {scores_per_thread} scores, plus one reader thread\n")
+    for profile in SQLITE_PROFILES:
+        result = _run_profile(profile, num_threads, scores_per_thread)
+        print(f"{profile}: {', '.join(sqlite_pragmas(profile))}")
+        print(f"  {result['submitted']} scores in {result['elapsed']:.2f} s "
+              f"= {result['throughput']:.0f} scores/s, reader {result['reads']:.0f} schedule loads/s")
+        print(f"  latency p50 {result['p50']:.1f} ms, p95 {result['p95']:.1f} ms, max {result['max']:.1f} ms")
+        pool = result["pool"]
+        print(f"  pool: peak {pool['peak_in_use']} in use (size {pool['size']} + {pool['max_overflow']} overflow), "
+              f"{pool['overflow_events']} overflow events, checkout p95 {pool['checkout_ms']['p95']} ms")
+        print(f"  errors: {len(result['errors'])}"
+              + (f" (first: {result['errors'][0]})" if result["errors"] else "") + "\n")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (1, 3):
+        print("Usage: python -m backend.loadtest [<threads> <scores_per_thread>]")
+        print("Example: python -m backend.loadtest 8 200")
+        sys.exit(1)
+
+    if len(sys.argv) == 3:
+        run_loadtest(int(sys.argv[1]), int(sys.argv[2]))
+    else:
+        run_loadtest()
@@ -1,36 +1,55 @@
 # python -m uvicorn backend.main:app --reload
 
-from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, Form
-from sqlalchemy.orm import Session
+from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, Form, Query, Request, Response, BackgroundTasks, Header
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
 from typing import List, Optional
+from contextlib import asynccontextmanager
 from datetime import datetime
 from pydantic import BaseModel
-import math
 import random
 import os
 import uuid
-import httpx
 
-from backend.database import engine, SessionLocal
-from backend import models, crud, schemas, schedule
-from backend.settings import CORS_ORIGINS, CREATE_DEFAULT_ADMIN, DEFAULT_ADMIN_USERNAME, DEFAULT_ADMIN_PASSWORD, SUPABASE_URL, SUPABASE_SERVICE_KEY
+from backend.database import engine, SessionLocal, async_engine, AsyncSessionLocal
+from backend.migrations import run_migrations
+from backend import models, crud, schemas, schedule, versioning, planner
+from backend.settings import CORS_ORIGINS, CREATE_DEFAULT_ADMIN, DEFAULT_ADMIN_USERNAME, DEFAULT_ADMIN_PASSWORD
 from backend.schemas import (
     TournamentCreate, TournamentRead, TournamentUpdate,
     PouleCreate, PouleRead,
     TeamCreate, TeamRead, TeamUpdate,
-    SponsorRead
+    SponsorRead, SchedulePreviewRequest, ScoreWrite, BulkScoreRequest
 )
 from backend.schedule import generate_group_phase, generate_knockout_phase, generate_final, get_team_by_rank
+from backend.standings import standings_engine, is_played, match_scores
+from backend.events import event_hub
+from backend.bracket import bracket_engine
+from backend.metrics import pool_status
+from backend.storage import BytesSource, LocalStorage, StorageError, sponsor_storage
+from backend import images, replay
 from backend.models import Tournament, Round, Match, Poule, User, Sponsor
+from backend.auth_cache import token_cache
 from backend.auth import (
-    verify_password, get_password_hash, create_access_token,
-    get_current_active_user
+    get_password_hash, create_access_token,
+    get_current_active_user, password_hasher
 )
+from backend.throttle import login_failure_limiter, login_ip_limiter
+from backend.idempotency import idempotency_store, fingerprint, REPLAY, IN_PROGRESS, MISMATCH
+from backend.scores import SCORE_FIELDS, write_score
 
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await sponsor_storage.aclose()  # the shared storage HTTP client
+
+
+app = FastAPI(lifespan=lifespan)
 
 # -------------------- CORS & Frontend --------------------
 app.add_middleware(
@@ -40,6 +59,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 app.mount("/frontend", StaticFiles(directory="frontend"), name="frontend")
+if isinstance(sponsor_storage, LocalStorage):
+    os.makedirs(sponsor_storage.root, exist_ok=True)
+    app.mount("/media", StaticFiles(directory=sponsor_storage.root), name="media")
 
 # Redirect root to frontend
 @app.get("/")
@@ -51,8 +73,24 @@ def root():
 def health_check():
     return {"status": "ok"}
 
+@app.get("/internal/metrics")
+def internal_metrics(current_user: User = Depends(get_current_active_user)):
+    """Process-local runtime metrics for sizing the deployment; admins only."""
+    return {
+        "database": pool_status(engine),
+        "database_async": pool_status(async_engine),
+        "auth_cache": token_cache.stats(),
+        "password_hashing": password_hasher.stats(),
+        "login_throttle": {
+            "per_ip": login_ip_limiter.stats(),
+            "failures_per_username": login_failure_limiter.stats(),
+        },
+        "idempotency": idempotency_store.stats(),
+    }
+
 # -------------------- DB Init --------------------
 models.Base.metadata.create_all(bind=engine)
+run_migrations(engine)
 
 # Create default admin user if configured (only in development/DEBUG mode)
 def init_admin_user():
@@ -100,6 +138,29 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    # Public reads and the async sponsor endpoints: run on the event loop instead of
+    # holding a threadpool worker per request
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# -------------------- Caching helpers --------------------
+def _tournament_changed(tournament_id: int):
+    """Teams, poules or schedule changed: drop the cached standings and bracket, bump the data version."""
+    standings_engine.invalidate(tournament_id)
+    bracket_engine.invalidate(tournament_id)
+    versioning.bump(tournament_id)
+
+
+def _not_modified(request: Request, response: Response, tournament_id: int, resource: str):
+    """Set the ETag of a public read; returns a 304 response if the client already has this version."""
+    tag = versioning.etag(tournament_id, resource)
+    headers = {"ETag": tag, "Cache-Control": "no-cache"}
+    if versioning.matches(request.headers.get("if-none-match"), tag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
 # -------------------- Auth Schemas --------------------
 class Token(BaseModel):
     access_token: str
@@ -111,14 +172,27 @@ class LoginRequest(BaseModel):
 
 # -------------------- Auth Endpoints --------------------
 @app.post("/auth/login", response_model=Token)
-def login(login_data: LoginRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == login_data.username).first()
-    if not user or not verify_password(login_data.password, user.hashed_password) or user.is_active != 1:
+async def login(login_data: LoginRequest, request: Request, db: AsyncSession = Depends(get_async_db)):
+    # Throttled before any hashing; bcrypt itself runs on the password hasher's own pool
+    client = request.client.host if request.client else "unknown"
+    wait = max(login_ip_limiter.retry_after(client), login_failure_limiter.retry_after(login_data.username))
+    if wait:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, try again later",
+            headers={"Retry-After": str(int(wait) + 1)},
+        )
+    login_ip_limiter.hit(client)
+
+    user = (await db.execute(select(User).where(User.username == login_data.username))).scalars().first()
+    if not user or not await password_hasher.verify(login_data.password, user.hashed_password) or user.is_active != 1:
+        login_failure_limiter.hit(login_data.username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    login_failure_limiter.reset(login_data.username)
     access_token = create_access_token(data={"sub": user.username})
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -148,8 +222,8 @@ def create_tournament(
 
 
 @app.get("/tournaments/", response_model=List[TournamentRead])
-def list_tournaments(db: Session = Depends(get_db)):
-    return db.query(models.Tournament).all()
+async def list_tournaments(db: AsyncSession = Depends(get_async_db)):
+    return (await db.execute(select(models.Tournament))).scalars().all()
 
 
 @app.put("/tournaments/{tournament_id}", response_model=TournamentRead)
@@ -173,6 +247,7 @@ def update_tournament(
 
     db.commit()
     db.refresh(db_tournament)
+    versioning.bump(tournament_id)
     return db_tournament
 
 
@@ -190,6 +265,7 @@ def delete_tournament(
 
     db.delete(tournament)
     db.commit()
+    _tournament_changed(tournament_id)
     return {"status": "deleted"}
 
 
@@ -211,6 +287,7 @@ def create_poule(
     db.add(db_poule)
     db.commit()
     db.refresh(db_poule)
+    _tournament_changed(tournament_id)
     return db_poule
 
 
@@ -235,6 +312,7 @@ def update_poule(
     db_poule.name = poule.name
     db.commit()
     db.refresh(db_poule)
+    _tournament_changed(db_poule.tournament_id)
     return db_poule
 
 
@@ -248,89 +326,115 @@ def delete_poule(
     if not db_poule:
         raise HTTPException(status_code=404, detail="Poule not found")
 
+    tournament_id = db_poule.tournament_id
     db.delete(db_poule)
     db.commit()
+    _tournament_changed(tournament_id)
     return {"status": "deleted"}
 
 
 # -------------------- Suggest Setup --------------------
 @app.get("/tournaments/{tournament_id}/suggest-setup")
-def suggest_setup(tournament_id: int, db: Session = Depends(get_db)):
+def suggest_setup(
+    tournament_id: int,
+    fields: Optional[List[int]] = Query(None),
+    mode: str = "rounds",
+    db: Session = Depends(get_db),
+):
+    """
+    Candidate poule setups with the exact round count and end time the scheduler
+    would produce (see planner.plan_shape). `fields` compares other field counts
+    too (default: the tournament's own).
+    """
     tournament = db.query(Tournament).filter(Tournament.id == tournament_id).first()
     if not tournament:
         raise HTTPException(status_code=404, detail="Tournament not found")
 
-    teams = db.query(models.Team).filter(models.Team.tournament_id == tournament_id).all()
-    N = len(teams)
+    N = db.query(func.count(models.Team.id)).filter(models.Team.tournament_id == tournament_id).scalar()
 
     if N < 4:
         return []
 
-    F = tournament.num_fields
-    slot_minutes = tournament.match_duration_minutes + tournament.break_duration_minutes
-
-    h, m = map(int, tournament.start_time.split(":"))
-    start_minutes = h * 60 + m
+    field_counts = sorted(set(fields)) if fields else [tournament.num_fields]
+    if any(f < 1 for f in field_counts):
+        raise HTTPException(status_code=400, detail="Aantal velden moet minimaal 1 zijn.")
+    options = _plan_options(mode, 0, False)
 
-    suggestions = []
-
-    for num_poules in range(2, N // 2 + 1, 2):  # even numbers only
-        base_size = N // num_poules
-        extra = N % num_poules
-
-        if base_size < 2:
+    def round_distance(rounds):
+        # 8 rounds is ideal, 9 next best, then by distance
+        if rounds == 8:
+            return 0
+        if rounds == 9:
+            return 1
+        return abs(rounds - 8.5) + 1
+
+    candidates = []  # (lower bound of the sort key, index, num_fields, settings, poule sizes)
+    for num_fields in field_counts:
+        settings = planner.ScheduleSettings(
+            num_fields=num_fields,
+            match_duration_minutes=tournament.match_duration_minutes,
+            break_duration_minutes=tournament.break_duration_minutes,
+            start_time=tournament.start_time,
+        )
+        for num_poules in range(2, N // 2 + 1):
+            base_size = N // num_poules
+            extra = N % num_poules
+
+            if base_size < 2:
+                break
+            if base_size > 7:
+                continue
+
+            poule_sizes = [base_size + 1] * extra + [base_size] * (num_poules - extra)
+            min_rounds = planner.min_total_rounds(tuple(poule_sizes), num_fields, options)
+            # Below 9 rounds a setup could still hit the ideal 8; from 9 on the distance only grows
+            best_key = (round_distance(min_rounds) if min_rounds >= 9 else 0, 0 if extra == 0 else 1)
+            candidates.append((best_key, len(candidates), num_fields, settings, poule_sizes))
+
+    # Dry-run the most promising candidates first, and stop once the rest can't
+    # beat the third best (ties keep the original order, like a stable sort)
+    ranked = []
+    for best_key, index, num_fields, settings, poule_sizes in sorted(candidates, key=lambda c: c[:2]):
+        if len(ranked) >= 3 and (best_key, index) > ranked[2][:2]:
             break
-        if base_size > 7:
-            continue
-
-        max_poule_size = base_size + (1 if extra > 0 else 0)
-
-        group_rounds = (max_poule_size - 1) * math.ceil(num_poules / F)
-        knockout_matches = (num_poules // 2) * max_poule_size
-        knockout_rounds = math.ceil(knockout_matches / F)
-        total_rounds = group_rounds + knockout_rounds + 1  # +1 for final
-
-        end_minutes = start_minutes + total_rounds * slot_minutes
-        end_h = end_minutes // 60
-        end_m = end_minutes % 60
-        estimated_end_time = f"{end_h:02d}:{end_m:02d}"
+        shape = planner.plan_shape(tuple(poule_sizes), settings, options)
+        num_poules = len(poule_sizes)
+        base_size, extra = divmod(N, num_poules)
 
         is_balanced = extra == 0
-        poule_sizes = [base_size + 1] * extra + [base_size] * (num_poules - extra)
-
+        warnings = []
         if is_balanced:
-            warning = None
             group_matches_per_team = str(base_size - 1)
         else:
-            warning = (
+            warnings.append(
                 f"{extra} poule{'s' if extra > 1 else ''} van {base_size + 1} teams, "
                 f"{num_poules - extra} poule{'s' if (num_poules - extra) > 1 else ''} van {base_size} teams. "
                 f"Teams in kleinere poules spelen 1 groepswedstrijd minder."
             )
             group_matches_per_team = f"{base_size - 1}–{base_size}"
+        # Knockout brackets that aren't a power of two start with byes (see planner.plan_bracket)
+        byes = (1 << (num_poules - 1).bit_length()) - num_poules
+        if byes:
+            warnings.append(
+                f"In het knock-outschema van de poulewinnaars krijg{'en' if byes > 1 else 't'} "
+                f"{byes} van de {num_poules} teams een bye naar de tweede ronde."
+            )
 
-        suggestions.append({
+        key = (round_distance(shape.total_rounds), 0 if is_balanced else 1)
+        ranked.append((key, index, {
             "num_poules": num_poules,
+            "num_fields": num_fields,
             "poule_sizes": poule_sizes,
             "is_balanced": is_balanced,
             "group_matches_per_team": group_matches_per_team,
-            "total_rounds": total_rounds,
-            "estimated_end_time": estimated_end_time,
-            "warning": warning,
-        })
-
-    def sort_key(s):
-        rounds = s["total_rounds"]
-        if rounds == 8:
-            distance = 0
-        elif rounds == 9:
-            distance = 1
-        else:
-            distance = abs(rounds - 8.5) + 1
-        return (distance, 0 if s["is_balanced"] else 1)
+            "group_rounds": shape.group_rounds,
+            "total_rounds": shape.total_rounds,
+            "estimated_end_time": shape.end_time.strftime("%H:%M"),
+            "warning": " ".join(warnings) or None,
+        }))
+        ranked.sort(key=lambda r: r[:2])
 
-    suggestions.sort(key=sort_key)
-    return suggestions[:3]
+    return [suggestion for _, _, suggestion in ranked[:3]]
 
 
 # -------------------- Auto Distribute --------------------
@@ -406,6 +510,7 @@ def auto_distribute(
             team_idx += 1
 
     db.commit()
+    _tournament_changed(tournament_id)
 
     is_balanced = extra == 0
     warning = None
@@ -441,7 +546,9 @@ def create_team(
             detail=f"Team naam '{team.name}' bestaat al in dit toernooi. Team namen moeten uniek zijn."
         )
     
-    return crud.create_team(db, tournament_id, team)
+    db_team = crud.create_team(db, tournament_id, team)
+    _tournament_changed(tournament_id)
+    return db_team
 
 
 @app.get("/tournaments/{tournament_id}/teams/", response_model=List[TeamRead])
@@ -480,6 +587,7 @@ def update_team(
 
     db.commit()
     db.refresh(db_team)
+    _tournament_changed(db_team.tournament_id)
     return db_team
 
 
@@ -507,6 +615,7 @@ def assign_team_to_poule(
     team.poule_id = poule_id
     db.commit()
     db.refresh(team)
+    _tournament_changed(team.tournament_id)
     return team
 
 
@@ -519,15 +628,35 @@ def delete_team(
     team = db.query(models.Team).filter(models.Team.id == team_id).first()
     if not team:
         raise HTTPException(status_code=404, detail="Team not found")
+    tournament_id = team.tournament_id
     db.delete(team)
     db.commit()
+    _tournament_changed(tournament_id)
     return {"status": "deleted"}
 
 
 # -------------------- Generate group phase --------------------
+def _plan_options(mode: str, min_rest_slots: int, avoid_adjacent_referee: bool) -> planner.PlanOptions:
+    if mode not in planner.SCHEDULE_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Onbekende planningsmodus '{mode}'. Kies uit: {', '.join(planner.SCHEDULE_MODES)}."
+        )
+    if min_rest_slots < 0:
+        raise HTTPException(status_code=400, detail="min_rest_slots mag niet negatief zijn.")
+    return planner.PlanOptions(
+        mode=mode,
+        min_rest_slots=min_rest_slots,
+        avoid_adjacent_referee=avoid_adjacent_referee,
+    )
+
+
 @app.post("/tournaments/{tournament_id}/generate-group-phase")
 def generate_group_phase_endpoint(
     tournament_id: int,
+    mode: str = "rounds",
+    min_rest_slots: int = 0,
+    avoid_adjacent_referee: bool = False,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -536,13 +665,21 @@ def generate_group_phase_endpoint(
     if not tournament:
         raise HTTPException(status_code=404, detail="Tournament not found")
 
+    options = _plan_options(mode, min_rest_slots, avoid_adjacent_referee)
+
     # Validation: check all poules have at least 2 teams
     poules = db.query(Poule).filter(Poule.tournament_id == tournament_id).all()
     if not poules:
         raise HTTPException(status_code=400, detail="Geen poules gevonden. Voeg eerst poules toe.")
     
+    team_counts = dict(
+        db.query(models.Team.poule_id, func.count(models.Team.id))
+        .filter(models.Team.tournament_id == tournament_id)
+        .group_by(models.Team.poule_id)
+        .all()
+    )
     for poule in poules:
-        team_count = len(poule.teams)
+        team_count = team_counts.get(poule.id, 0)
         if team_count < 2:
             raise HTTPException(
                 status_code=400,
@@ -560,7 +697,125 @@ def generate_group_phase_endpoint(
             detail="Groepsfase bestaat al en wordt niet overschreven."
         )
 
-    return schedule.generate_group_phase(db, tournament_id)
+    result = schedule.generate_group_phase(db, tournament_id, options)
+    _tournament_changed(tournament_id)
+    event_hub.publish(tournament_id, "schedule", {"phase": "group"})
+    return result
+
+
+# -------------------- Schedule preview --------------------
+@app.post("/tournaments/{tournament_id}/schedule-preview")
+def schedule_preview(
+    tournament_id: int,
+    body: SchedulePreviewRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Dry-run the full planner (group + knockout + final) without writing anything.
+    Uses the current poules, an even split over `num_poules`, or an explicit
+    assignment in `poules`. Plans are memoised, so repeated previews are instant.
+    """
+    tournament = db.query(Tournament).filter(Tournament.id == tournament_id).first()
+    if not tournament:
+        raise HTTPException(status_code=404, detail="Tournament not found")
+
+    options = _plan_options(body.mode, body.min_rest_slots, body.avoid_adjacent_referee)
+    team_names = dict(
+        db.query(models.Team.id, models.Team.name)
+        .filter(models.Team.tournament_id == tournament_id)
+        .order_by(models.Team.id)
+        .all()
+    )
+
+    if body.poules is not None:
+        assigned = [tid for poule in body.poules for tid in poule]
+        if any(tid not in team_names for tid in assigned) or len(assigned) != len(set(assigned)):
+            raise HTTPException(status_code=400, detail="Ongeldige poule-indeling: onbekende of dubbele teams.")
+        team_groups = [tuple(poule) for poule in body.poules]
+    elif body.num_poules is not None:
+        if body.num_poules < 2 or len(team_names) < body.num_poules * 2:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Te weinig teams ({len(team_names)}) voor {body.num_poules} poules. Minimaal 2 teams per poule vereist."
+            )
+        team_groups = planner.split_into_poules(list(team_names), body.num_poules)
+    else:
+        team_groups = [spec.team_ids for spec in schedule.load_poule_specs(db, tournament_id)]
+
+    if not team_groups or any(len(group) < 2 for group in team_groups):
+        raise HTTPException(status_code=400, detail="Elke poule moet minimaal 2 teams hebben.")
+
+    # Hypothetical poules get negative ids; names follow auto-distribute ("Poule A", ...)
+    poules = tuple(
+        planner.PouleSpec(id=-(i + 1), team_ids=tuple(group))
+        for i, group in enumerate(team_groups)
+    )
+    poule_names = {-(i + 1): f"Poule {chr(ord('A') + i)}" for i in range(len(poules))}
+    settings = schedule.schedule_settings(tournament)
+    plan = planner.cached_plan(poules, settings, options)
+
+    match_counts = {tid: 0 for tid in team_names}
+    referee_counts = {tid: 0 for tid in team_names}
+    for rnd in plan.rounds:
+        for m in rnd.matches:
+            for tid in (m.home_team_id, m.away_team_id):
+                if tid in match_counts:
+                    match_counts[tid] += 1
+            if m.referee_team_id in referee_counts:
+                referee_counts[m.referee_team_id] += 1
+
+    def team(tid):
+        return {"name": team_names[tid]} if tid in team_names else None
+
+    def poule(pid):
+        return {"name": poule_names[pid]} if pid in poule_names else None
+
+    def winner_of(position):
+        return {"round_number": position[0], "field_number": position[1]} if position else None
+
+    return {
+        "end_time": plan.end_time.strftime("%H:%M") if plan.end_time else None,
+        "stats": planner.plan_stats(plan, settings.num_fields, options.min_rest_slots),
+        "poules": [
+            {"name": poule_names[p.id], "team_ids": list(p.team_ids)}
+            for p in poules
+        ],
+        "teams": [
+            {
+                "id": tid,
+                "name": name,
+                "group_matches": match_counts[tid],
+                "referee_duties": referee_counts[tid],
+            }
+            for tid, name in team_names.items()
+        ],
+        "rounds": [
+            {
+                "round_number": rnd.round_number,
+                "type": rnd.type,
+                "start_time": rnd.start_time.strftime("%H:%M"),
+                "end_time": rnd.end_time.strftime("%H:%M"),
+                "matches": [
+                    {
+                        "field_number": m.field_number,
+                        "poule": poule(m.poule_id),
+                        "home_team": team(m.home_team_id),
+                        "away_team": team(m.away_team_id),
+                        "referee_team": team(m.referee_team_id),
+                        "home_rank_position": m.home_rank_position,
+                        "away_rank_position": m.away_rank_position,
+                        "home_rank_poule": poule(m.home_rank_poule_id),
+                        "away_rank_poule": poule(m.away_rank_poule_id),
+                        "home_winner_of": winner_of(m.home_winner_of),
+                        "away_winner_of": winner_of(m.away_winner_of),
+                    }
+                    for m in rnd.matches
+                ],
+            }
+            for rnd in plan.rounds
+        ],
+    }
 
 
 # -------------------- Generate knockout phase --------------------
@@ -582,9 +837,12 @@ def generate_knockout_phase_endpoint(
         )
 
     try:
-        return schedule.generate_knockout_phase(db, tournament_id)
+        result = schedule.generate_knockout_phase(db, tournament_id)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    versioning.bump(tournament_id)
+    event_hub.publish(tournament_id, "schedule", {"phase": "knockout"})
+    return result
 
 
 # -------------------- Generate final --------------------
@@ -606,187 +864,95 @@ def generate_final_endpoint(
         )
 
     try:
-        return schedule.generate_final(db, tournament_id)
+        result = schedule.generate_final(db, tournament_id)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
-
-
-def _points_for_against_played(matches, team_ids):
-    """Compute points, points_for, points_against from matches (set-based). Only counts sets with scores."""
-    points = {tid: 0 for tid in team_ids}
-    points_for = {tid: 0 for tid in team_ids}
-    points_against = {tid: 0 for tid in team_ids}
-
-    for m in matches:
-        if not m.home_team_id or not m.away_team_id:
-            continue
-        for (h, a) in [(m.home_set1_score, m.away_set1_score), (m.home_set2_score, m.away_set2_score)]:
-            if h is not None and a is not None:
-                points_for[m.home_team_id] += h
-                points_against[m.home_team_id] += a
-                points_for[m.away_team_id] += a
-                points_against[m.away_team_id] += h
-                if h > a:
-                    points[m.home_team_id] += 2
-                elif a > h:
-                    points[m.away_team_id] += 2
-                else:
-                    points[m.home_team_id] += 1
-                    points[m.away_team_id] += 1
-
-    return points, points_for, points_against
+    versioning.bump(tournament_id)
+    event_hub.publish(tournament_id, "schedule", {"phase": "final"})
+    return result
 
 
 # -------------------- Standings --------------------
 @app.get("/tournaments/{tournament_id}/standings")
-def get_standings(tournament_id: int, db: Session = Depends(get_db)):
-    poules = db.query(Poule).filter(Poule.tournament_id == tournament_id).all()
-    result = []
+async def get_standings(
+    tournament_id: int,
+    request: Request,
+    response: Response,
+    at: Optional[datetime] = Query(None, description="Standings as they were at this moment (ISO 8601, UTC unless an offset is given)"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if at is not None:
+        # Replayed from the score log; not cached
+        return await db.run_sync(replay.standings_at, tournament_id, at)
 
-    for poule in poules:
-        matches = db.query(Match).filter(Match.poule_id == poule.id).all()
-        played_matches = [
-            m for m in matches
-            if m.home_set1_score is not None and m.away_set1_score is not None
-            and m.home_set2_score is not None and m.away_set2_score is not None
-            and not (m.home_set1_score == 0 and m.away_set1_score == 0)
-            and not (m.home_set2_score == 0 and m.away_set2_score == 0)
-        ]
+    not_modified = _not_modified(request, response, tournament_id, "standings")
+    if not_modified:
+        return not_modified
 
-        team_ids = [t.id for t in poule.teams]
-        points, points_for, points_against = _points_for_against_played(played_matches, team_ids)
-        balance = {tid: points_for[tid] - points_against[tid] for tid in team_ids}
+    # Served from the in-memory standings engine; only rebuilt from the DB after invalidation
+    return await db.run_sync(standings_engine.get, tournament_id)
 
-        teams_sorted = sorted(
-            poule.teams,
-            key=lambda t: (points[t.id], balance[t.id]),
-            reverse=True
-        )
 
-        result.append({
-            "id": poule.id,
-            "name": poule.name,
-            "teams": [
-                {
-                    "id": team.id,
-                    "name": team.name,
-                    "points": points[team.id],
-                    "points_for": points_for[team.id],
-                    "points_against": points_against[team.id],
-                    "balance": balance[team.id],
-                    "played": len([m for m in played_matches if m.home_team_id == team.id or m.away_team_id == team.id]),
-                }
-                for team in teams_sorted
-            ],
-        })
-
-    return result
+@app.post("/tournaments/{tournament_id}/standings/rebuild")
+def rebuild_standings(
+    tournament_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Consistency check: rebuild the cached standings from the database and report any drift."""
+    consistent = standings_engine.rebuild(db, tournament_id)
+    if not consistent:
+        # Clients may hold the drifted standings under the current ETag
+        versioning.bump(tournament_id)
+    return {"consistent": consistent}
 
 
-def _get_tournament_progression_level(db: Session, tournament_id: int, team_id: int):
+def _get_tournament_progression_levels(db: Session, tournament_id: int):
     """
-    Determine tournament progression level for a team based on their poule rank.
-    Returns: (level, final_position)
+    Determine tournament progression level for every team based on their poule rank.
+    Ranks each poule once and resolves the final once, instead of per team.
+    Returns: {team_id: (level, final_position)}; teams without a poule are missing (level 5).
     - level: 1=positions 1-4 (#1 teams), 2=positions 5-8 (#2 teams), 3=positions 9-12 (#3 teams), 4=positions 13-16 (#4 teams), 5=group only
     - final_position: 1=winner, 2=runner-up (only for final participants), None=not in final
     """
-    # Check if team was in final (only #1 teams can reach final)
-    final_round = db.query(Round).filter(
-        Round.tournament_id == tournament_id,
-        Round.type == "final"
-    ).first()
-    
-    if final_round:
-        final_match = db.query(Match).filter(Match.round_id == final_round.id).first()
-        if final_match and final_match.home_team_id and final_match.away_team_id:
-            # Check if match is complete
-            if (final_match.home_set1_score is not None and final_match.away_set1_score is not None
-                and final_match.home_set2_score is not None and final_match.away_set2_score is not None
-                and not (final_match.home_set1_score == 0 and final_match.away_set1_score == 0)
-                and not (final_match.home_set2_score == 0 and final_match.away_set2_score == 0)):
-                
-                if final_match.home_team_id == team_id or final_match.away_team_id == team_id:
-                    # Determine winner
-                    h1, a1 = final_match.home_set1_score or 0, final_match.away_set1_score or 0
-                    h2, a2 = final_match.home_set2_score or 0, final_match.away_set2_score or 0
-                    home_sets = (1 if h1 > a1 else 0) + (1 if h2 > a2 else 0)
-                    away_sets = (1 if a1 > h1 else 0) + (1 if a2 > h2 else 0)
-                    
-                    if home_sets > away_sets:
-                        return (1, 1 if final_match.home_team_id == team_id else 2)
-                    elif away_sets > home_sets:
-                        return (1, 1 if final_match.away_team_id == team_id else 2)
-                    # Tie: use total points
-                    if (h1 + h2) > (a1 + a2):
-                        return (1, 1 if final_match.home_team_id == team_id else 2)
-                    elif (a1 + a2) > (h1 + h2):
-                        return (1, 1 if final_match.away_team_id == team_id else 2)
-                    # Still tied: both get position 1.5 (shouldn't happen, but handle gracefully)
-                    return (1, 1.5)
-    
-    # Determine level based on poule rank position
-    # Find which poule rank this team achieved
-    team = db.query(models.Team).filter(models.Team.id == team_id).first()
-    if not team or not team.poule_id:
-        return (5, None)  # Team not in a poule - group only
-    
-    poule = db.query(Poule).filter(Poule.id == team.poule_id).first()
-    if not poule:
-        return (5, None)  # Poule not found - group only
-    
-    # Calculate poule standings to find team's rank
-    poule_matches = db.query(Match).filter(Match.poule_id == poule.id).all()
-    played_matches = [
-        m for m in poule_matches
-        if m.home_set1_score is not None and m.away_set1_score is not None
-        and m.home_set2_score is not None and m.away_set2_score is not None
-        and not (m.home_set1_score == 0 and m.away_set1_score == 0)
-        and not (m.home_set2_score == 0 and m.away_set2_score == 0)
-    ]
-    
-    team_ids = [t.id for t in poule.teams]
-    points, points_for, points_against = _points_for_against_played(played_matches, team_ids)
-    balance = {tid: points_for[tid] - points_against[tid] for tid in team_ids}
-    
-    teams_sorted = sorted(
-        poule.teams,
-        key=lambda t: (points[t.id], balance[t.id]),
-        reverse=True
-    )
-    
-    # Find team's rank (1-indexed)
-    team_rank_position = None
-    for idx, t in enumerate(teams_sorted):
-        if t.id == team_id:
-            team_rank_position = idx + 1
-            break
-    
-    if not team_rank_position:
-        return (5, None)  # Team not found in poule standings
-    
     # Map poule rank to progression level:
     # Rank 1 → level 1 (positions 1-4)
     # Rank 2 → level 2 (positions 5-8)
     # Rank 3 → level 3 (positions 9-12)
     # Rank 4 → level 4 (positions 13-16)
     # Rank 5+ → level 5 (group only, ranked by group points)
-    
-    if team_rank_position == 1:
-        # Check if team reached final (already checked above)
-        # If not in final, they're still level 1 (positions 1-4)
-        return (1, None)
-    elif team_rank_position == 2:
-        return (2, None)  # Positions 5-8
-    elif team_rank_position == 3:
-        return (3, None)  # Positions 9-12
-    elif team_rank_position == 4:
-        return (4, None)  # Positions 13-16
-    else:
-        return (5, None)  # Group only, ranked by group phase points
+    progression = {}
+    for poule in standings_engine.get(db, tournament_id):
+        for idx, row in enumerate(poule["teams"]):
+            rank = idx + 1
+            progression[row["id"]] = (rank if rank <= 4 else 5, None)
+
+    # Final participants (only #1 teams can reach final) get their final position
+    final_match = (
+        db.query(Match)
+        .join(Round, Match.round_id == Round.id)
+        .filter(Round.tournament_id == tournament_id, Round.type == "final")
+        .order_by(Round.id, Match.id)
+        .first()
+    )
+    if (final_match and final_match.home_team_id and final_match.away_team_id
+            and is_played(*match_scores(final_match))):
+        home_id, away_id = final_match.home_team_id, final_match.away_team_id
+        winner = planner.match_winner(*match_scores(final_match))
+        home_won = None if winner is None else winner == "home"
+
+        if home_won is None:
+            # Tied on sets and total points: both get position 1.5 (shouldn't happen, but handle gracefully)
+            progression[home_id] = progression[away_id] = (1, 1.5)
+        else:
+            progression[home_id] = (1, 1 if home_won else 2)
+            progression[away_id] = (1, 2 if home_won else 1)
+
+    return progression
 
 
 @app.get("/tournaments/{tournament_id}/overall-standings")
-def get_overall_standings(tournament_id: int, db: Session = Depends(get_db)):
+async def get_overall_standings(tournament_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
     """
     Overall ranking of all teams.
     Ranking prioritizes tournament progression:
@@ -796,18 +962,17 @@ def get_overall_standings(tournament_id: int, db: Session = Depends(get_db)):
     4. Group phase only teams (ranked by group phase points)
     Within each level, teams are sorted by group phase points, then balance.
     """
-    group_matches = db.query(Match).filter(
-        Match.tournament_id == tournament_id,
-        Match.poule_id.isnot(None),
-    ).all()
+    not_modified = _not_modified(request, response, tournament_id, "overall-standings")
+    if not_modified:
+        return not_modified
+
+    # Shares the standings engine and progression levels with the sync code paths
+    return await db.run_sync(_overall_standings, tournament_id)
 
-    played = [
-        m for m in group_matches
-        if m.home_set1_score is not None and m.away_set1_score is not None
-        and m.home_set2_score is not None and m.away_set2_score is not None
-        and not (m.home_set1_score == 0 and m.away_set1_score == 0)
-        and not (m.home_set2_score == 0 and m.away_set2_score == 0)
-    ]
+
+def _overall_standings(db: Session, tournament_id: int):
+    # Group phase points come from the shared (cached) poule tables
+    group_rows = standings_engine.team_rows(db, tournament_id)
 
     # Also get knockout and final matches for "played" count
     knockout_rounds = db.query(Round).filter(
@@ -827,13 +992,18 @@ def get_overall_standings(tournament_id: int, db: Session = Depends(get_db)):
 
     teams = db.query(models.Team).filter(models.Team.tournament_id == tournament_id).all()
     team_ids = [t.id for t in teams]
-    points, points_for, points_against = _points_for_against_played(played, team_ids)
-    balance = {tid: points_for[tid] - points_against[tid] for tid in team_ids}
+    no_row = {"points": 0, "points_for": 0, "points_against": 0, "balance": 0, "played": 0}
+    rows = {tid: group_rows.get(tid, no_row) for tid in team_ids}
+    points = {tid: rows[tid]["points"] for tid in team_ids}
+    points_for = {tid: rows[tid]["points_for"] for tid in team_ids}
+    points_against = {tid: rows[tid]["points_against"] for tid in team_ids}
+    balance = {tid: rows[tid]["balance"] for tid in team_ids}
     
     # Get progression level for each team
+    progression = _get_tournament_progression_levels(db, tournament_id)
     progression_data = {}
     for team in teams:
-        level, final_pos = _get_tournament_progression_level(db, tournament_id, team.id)
+        level, final_pos = progression.get(team.id, (5, None))
         progression_data[team.id] = {
             "level": level,  # 1=positions 1-4 (#1), 2=positions 5-8 (#2), 3=positions 9-12 (#3), 4=positions 13-16 (#4), 5=group only
             "final_position": final_pos  # 1=winner, 2=runner-up (only for final participants), None=not in final
@@ -895,7 +1065,7 @@ def get_overall_standings(tournament_id: int, db: Session = Depends(get_db)):
 
     # Calculate total played matches (group + knockout)
     def count_played_matches(team_id):
-        group_count = len([m for m in played if m.home_team_id == team_id or m.away_team_id == team_id])
+        group_count = rows[team_id]["played"]
         knockout_count = len([m for m in played_knockout if m.home_team_id == team_id or m.away_team_id == team_id])
         return group_count + knockout_count
 
@@ -922,60 +1092,102 @@ def get_overall_standings(tournament_id: int, db: Session = Depends(get_db)):
 
 
 @app.get("/tournaments/{tournament_id}/rounds")
-def get_rounds(tournament_id: int, db: Session = Depends(get_db)):
-    rounds = (
-        db.query(Round)
-        .filter(Round.tournament_id == tournament_id)
+async def get_rounds(tournament_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    not_modified = _not_modified(request, response, tournament_id, "rounds")
+    if not_modified:
+        return not_modified
+
+    rounds = (await db.execute(
+        select(Round)
+        .where(Round.tournament_id == tournament_id)
         .order_by(Round.round_number)
-        .all()
-    )
-
-    result = []
-
-    for rnd in rounds:
-        matches = (
-            db.query(Match)
-            .filter(Match.round_id == rnd.id)
-            .all()
+    )).scalars().all()
+
+    # All matches of the tournament in one query, with team/poule names joined in,
+    # instead of one query per round plus lazy loads per match: two queries in
+    # total (rounds, matches), whatever the tournament size
+    HomeTeam, AwayTeam, RefereeTeam = aliased(models.Team), aliased(models.Team), aliased(models.Team)
+    HomeRankPoule, AwayRankPoule = aliased(Poule), aliased(Poule)
+    rows = (await db.execute(
+        select(
+            Match.id, Match.round_id, Match.field_number,
+            HomeTeam.name, AwayTeam.name, RefereeTeam.name,
+            Match.home_rank_position, Match.away_rank_position,
+            HomeRankPoule.name, AwayRankPoule.name,
+            Match.home_set1_score, Match.away_set1_score,
+            Match.home_set2_score, Match.away_set2_score,
+            Match.home_winner_of_id, Match.away_winner_of_id, Match.version,
         )
+        .join(Round, Match.round_id == Round.id)
+        .outerjoin(HomeTeam, Match.home_team_id == HomeTeam.id)
+        .outerjoin(AwayTeam, Match.away_team_id == AwayTeam.id)
+        .outerjoin(RefereeTeam, Match.referee_team_id == RefereeTeam.id)
+        .outerjoin(HomeRankPoule, Match.home_rank_poule_id == HomeRankPoule.id)
+        .outerjoin(AwayRankPoule, Match.away_rank_poule_id == AwayRankPoule.id)
+        .where(Round.tournament_id == tournament_id)
+        .order_by(Match.id)
+    )).all()
+
+    # Later knockout stages point at the match whose winner they take
+    round_numbers = {rnd.id: rnd.round_number for rnd in rounds}
+    positions = {
+        row[0]: {"round_number": round_numbers[row[1]], "field_number": row[2]}
+        for row in rows
+    }
+
+    matches_by_round = {rnd.id: [] for rnd in rounds}
+    for (
+        match_id, round_id, field_number,
+        home_name, away_name, referee_name,
+        home_rank_position, away_rank_position,
+        home_rank_poule_name, away_rank_poule_name,
+        home_set1, away_set1, home_set2, away_set2,
+        home_winner_of_id, away_winner_of_id, version,
+    ) in rows:
+        matches_by_round[round_id].append({
+            "id": match_id,
+            "field_number": field_number,
+            "home_team": {"name": home_name} if home_name is not None else None,
+            "away_team": {"name": away_name} if away_name is not None else None,
+            "referee_team": {"name": referee_name} if referee_name is not None else None,
+            "home_rank_position": home_rank_position,
+            "away_rank_position": away_rank_position,
+            "home_rank_poule": (
+                {"name": home_rank_poule_name}
+                if home_rank_poule_name is not None else None
+            ),
+            "away_rank_poule": (
+                {"name": away_rank_poule_name}
+                if away_rank_poule_name is not None else None
+            ),
+            "home_winner_of": positions.get(home_winner_of_id),
+            "away_winner_of": positions.get(away_winner_of_id),
+            "home_set1_score": home_set1,
+            "away_set1_score": away_set1,
+            "home_set2_score": home_set2,
+            "away_set2_score": away_set2,
+            "version": version,
+        })
 
-        result.append({
+    return [
+        {
             "id": rnd.id,
             "round_number": rnd.round_number,
             "type": rnd.type,
             "start_time": rnd.start_time.strftime("%H:%M"),
             "end_time": rnd.end_time.strftime("%H:%M"),  # optional, useful for frontend
-            "matches": [
-                {
-                    "id": m.id,
-                    "field_number": m.field_number,
-                    "home_team": {"name": m.home_team.name} if m.home_team else None,
-                    "away_team": {"name": m.away_team.name} if m.away_team else None,
-                    "referee_team": {"name": m.referee_team.name} if m.referee_team else None,
-                    "home_rank_position": m.home_rank_position,
-                    "away_rank_position": m.away_rank_position,
-                    "home_rank_poule": (
-                        {"name": m.home_rank_poule.name} 
-                        if m.home_rank_poule else None
-                    ),
-                    "away_rank_poule":(
-                        {"name": m.away_rank_poule.name}
-                        if m.away_rank_poule else None
-                    ),
-                    "home_set1_score": m.home_set1_score,
-                    "away_set1_score": m.away_set1_score,
-                    "home_set2_score": m.home_set2_score,
-                    "away_set2_score": m.away_set2_score,
-                }
-                for m in matches
-            ]
-        })
-
-    return result
+            "matches": matches_by_round[rnd.id],
+        }
+        for rnd in rounds
+    ]
 
 @app.get("/tournaments/{tournament_id}/phase-status")
-def get_phase_status(tournament_id: int, db: Session = Depends(get_db)):
+async def get_phase_status(tournament_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
     """Check if phases are complete (all matches have scores filled in)."""
+    not_modified = _not_modified(request, response, tournament_id, "phase-status")
+    if not_modified:
+        return not_modified
+
     def is_match_complete(m):
         """Check if a match has all scores filled in."""
         return (
@@ -986,18 +1198,18 @@ def get_phase_status(tournament_id: int, db: Session = Depends(get_db)):
         )
     
     # Check group phase completion
-    group_matches = db.query(Match).filter(
+    group_matches = (await db.execute(select(Match).where(
         Match.tournament_id == tournament_id,
         Match.poule_id.isnot(None)
-    ).all()
+    ))).scalars().all()
     
     group_complete = len(group_matches) > 0 and all(is_match_complete(m) for m in group_matches)
     
     # Check knockout phase completion
-    knockout_rounds = db.query(Round).filter(
+    knockout_rounds = (await db.execute(select(Round).where(
         Round.tournament_id == tournament_id,
         Round.type == "knockout"
-    ).all()
+    ))).scalars().all()
     
     knockout_complete = False
     knockout_matches_total = 0
@@ -1005,9 +1217,9 @@ def get_phase_status(tournament_id: int, db: Session = Depends(get_db)):
     
     if knockout_rounds:
         knockout_round_ids = [r.id for r in knockout_rounds]
-        knockout_matches = db.query(Match).filter(
+        knockout_matches = (await db.execute(select(Match).where(
             Match.round_id.in_(knockout_round_ids)
-        ).all()
+        ))).scalars().all()
         knockout_matches_total = len(knockout_matches)
         knockout_matches_completed = len([m for m in knockout_matches if is_match_complete(m)])
         knockout_complete = knockout_matches_total > 0 and all(is_match_complete(m) for m in knockout_matches)
@@ -1022,50 +1234,250 @@ def get_phase_status(tournament_id: int, db: Session = Depends(get_db)):
     }
 
 
+def _idempotent(key: Optional[str], user: User, scope: str, payload, response: Response, handler):
+    """Run handler once per Idempotency-Key; retries with the same key get the first response back."""
+    if not key:
+        return handler()
+    scoped = (user.id, scope, key)
+    state, stored = idempotency_store.begin(scoped, fingerprint(payload))
+    if state == REPLAY:
+        response.headers["Idempotent-Replayed"] = "true"
+        return stored
+    if state == IN_PROGRESS:
+        raise HTTPException(status_code=409, detail="Dit verzoek wordt al verwerkt", headers={"Retry-After": "1"})
+    if state == MISMATCH:
+        raise HTTPException(status_code=422, detail="Idempotency-Key is al gebruikt voor een ander verzoek")
+    try:
+        result = handler()
+    except BaseException:
+        idempotency_store.release(scoped)
+        raise
+    idempotency_store.complete(scoped, result)
+    return result
+
+
+def _score_conflict(match: Match):
+    """409 body for a score write based on an outdated version: the match as it is now."""
+    return {
+        "message": "De score is intussen door iemand anders gewijzigd",
+        "match": {"id": match.id, "version": match.version, **{field: getattr(match, field) for field in SCORE_FIELDS}},
+    }
+
+
 @app.post("/matches/{match_id}/score")
 def submit_score(
     match_id: int,
-    score_data: dict,
+    body: ScoreWrite,
+    response: Response,
+    idempotency_key: Optional[str] = Header(default=None),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
+    """
+    Save the scores of a match. With "version" (the match version the client
+    loaded) the write only goes through if nobody changed the score since: 409
+    otherwise. Retries with the same Idempotency-Key header return the first response.
+    """
+    return _idempotent(
+        idempotency_key, current_user, f"match:{match_id}", body.model_dump(), response,
+        lambda: _submit_score(db, match_id, body, current_user.id),
+    )
+
+
+def _submit_score(db: Session, match_id: int, body: ScoreWrite, user_id: int):
     match = db.query(Match).filter(Match.id == match_id).first()
     if not match:
         raise HTTPException(status_code=404, detail="Match not found")
 
-    match.home_set1_score = score_data.get("home_set1_score")
-    match.away_set1_score = score_data.get("away_set1_score")
-    match.home_set2_score = score_data.get("home_set2_score")
-    match.away_set2_score = score_data.get("away_set2_score")
+    scores = (body.home_set1_score, body.away_set1_score, body.home_set2_score, body.away_set2_score)
+    if scores == match_scores(match):
+        # Nothing to change, e.g. a retry of a write whose response got lost
+        return {"message": "Score opgeslagen", "knockout_filled": 0, "version": match.version}
+    if not write_score(db, match_id, body.model_dump(), body.version, user_id):
+        db.rollback()
+        raise HTTPException(status_code=409, detail=_score_conflict(match))
 
     db.commit()
+    standings_engine.apply_match(match)
+    filled = schedule.resolve_after_score(db, match)
+    versioning.bump(match.tournament_id)
+    _publish_score(db, match)
+    if filled:
+        event_hub.publish(match.tournament_id, "schedule", {"phase": "knockout", "filled": list(filled)})
 
-    return {"message": "Score opgeslagen"}
+    return {"message": "Score opgeslagen", "knockout_filled": len(filled), "version": match.version}
 
 
-# -------------------- Sponsors --------------------
-ALLOWED_IMAGE_TYPES = {"image/png", "image/jpeg", "image/gif", "image/webp", "image/svg+xml"}
+def _publish_score(db: Session, match: Match):
+    """Push the changed match, and for group matches its poule's new table, to live subscribers."""
+    if not event_hub.subscriber_count(match.tournament_id):
+        return
+    event_hub.publish(match.tournament_id, "score", {
+        "match": {
+            "id": match.id,
+            "round_id": match.round_id,
+            "poule_id": match.poule_id,
+            "home_set1_score": match.home_set1_score,
+            "away_set1_score": match.away_set1_score,
+            "home_set2_score": match.home_set2_score,
+            "away_set2_score": match.away_set2_score,
+            "version": match.version,
+        },
+        "standings": (
+            standings_engine.get(db, match.tournament_id, match.poule_id)
+            if match.poule_id is not None else []
+        ),
+    })
+
+
+def _standings_positions(db: Session, tournament_id: int):
+    """{team_id: (poule_id, rank, standings row)} from the cached standings."""
+    return {
+        row["id"]: (poule["id"], rank, row)
+        for poule in standings_engine.get(db, tournament_id)
+        for rank, row in enumerate(poule["teams"], start=1)
+    }
 
-_SUPABASE_PUBLIC_PREFIX = "/storage/v1/object/public/sponsors/"
+
+@app.post("/tournaments/{tournament_id}/scores")
+def submit_scores(
+    tournament_id: int,
+    body: BulkScoreRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(default=None),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Save the scores of many matches (e.g. a whole round) at once: one query loads
+    the matches, one commit saves them. All or nothing: if any entry is invalid,
+    or based on an outdated match version (409), nothing is saved. Returns a
+    result per match plus the standings rows that changed (standings_delta).
+    Retries with the same Idempotency-Key header return the first response.
+    """
+    return _idempotent(
+        idempotency_key, current_user, f"tournament:{tournament_id}", body.model_dump(), response,
+        lambda: _submit_scores(db, tournament_id, body, current_user.id),
+    )
 
 
-def _supabase_upload(file_bytes: bytes, storage_path: str, content_type: str) -> str:
-    upload_url = f"{SUPABASE_URL}/storage/v1/object/sponsors/{storage_path}"
-    headers = {
-        "Authorization": f"Bearer {SUPABASE_SERVICE_KEY}",
-        "Content-Type": content_type,
-        "x-upsert": "true",
+def _submit_scores(db: Session, tournament_id: int, body: BulkScoreRequest, user_id: int):
+    match_ids = [s.match_id for s in body.scores]
+    matches = {
+        m.id: m for m in db.query(Match)
+        .filter(Match.tournament_id == tournament_id, Match.id.in_(match_ids))
+        .all()
     }
-    resp = httpx.put(upload_url, content=file_bytes, headers=headers)
-    if resp.status_code not in (200, 201):
-        raise HTTPException(status_code=500, detail=f"Kon afbeelding niet uploaden: {resp.text}")
-    return f"{SUPABASE_URL}/storage/v1/object/public/sponsors/{storage_path}"
 
+    results = []
+    seen = set()
+    for s in body.scores:
+        if s.match_id in seen:
+            results.append({"match_id": s.match_id, "status": "error", "detail": "Wedstrijd staat dubbel in de invoer"})
+        elif s.match_id not in matches:
+            results.append({"match_id": s.match_id, "status": "error", "detail": "Wedstrijd niet gevonden in dit toernooi"})
+        else:
+            results.append({"match_id": s.match_id, "status": "ok"})
+        seen.add(s.match_id)
+    if any(r["status"] == "error" for r in results):
+        raise HTTPException(status_code=422, detail={
+            "message": "Geen scores opgeslagen: controleer de gemarkeerde wedstrijden",
+            "results": results,
+        })
+
+    before = _standings_positions(db, tournament_id)
+    changed = []
+    for s, result in zip(body.scores, results):
+        match = matches[s.match_id]
+        scores = (s.home_set1_score, s.away_set1_score, s.home_set2_score, s.away_set2_score)
+        if scores == match_scores(match):
+            result["status"] = "unchanged"
+        elif s.version is not None and s.version != match.version:
+            result["status"] = "conflict"
+        else:
+            result["status"] = "updated"
+            changed.append((match, s))
+
+    conflicts = [matches[r["match_id"]] for r in results if r["status"] == "conflict"]
+    filled = {}
+    if not conflicts and changed:
+        for match, s in changed:
+            if not write_score(db, match.id, s.model_dump(), s.version, user_id):
+                conflicts.append(match)  # changed since it was loaded above
+        if conflicts:
+            db.rollback()
+    if conflicts:
+        raise HTTPException(status_code=409, detail={
+            "message": "Geen scores opgeslagen: scores zijn intussen door iemand anders gewijzigd",
+            "conflicts": [_score_conflict(match)["match"] for match in conflicts],
+        })
 
-def _supabase_delete(storage_path: str):
-    delete_url = f"{SUPABASE_URL}/storage/v1/object/sponsors/{storage_path}"
-    headers = {"Authorization": f"Bearer {SUPABASE_SERVICE_KEY}"}
-    httpx.delete(delete_url, headers=headers)
+    changed = [match for match, _ in changed]
+    if changed:
+        changed_ids = [m.id for m in changed]
+        db.commit()
+        # Refresh the expired matches in one query rather than one per match
+        db.query(Match).filter(Match.id.in_(list(matches))).all()
+        for match in changed:
+            standings_engine.apply_match(match)
+        # Knockout resolution once per poule (it looks at the whole poule, but a reset
+        # score decides whether the poule's seeds are cleared) and per knockout match
+        poule_matches = {}
+        for match in changed:
+            if match.poule_id is None:
+                continue
+            if match.poule_id not in poule_matches or not is_played(*match_scores(match)):
+                poule_matches[match.poule_id] = match
+        for match in changed:
+            if match.poule_id is None or poule_matches[match.poule_id] is match:
+                filled.update(schedule.resolve_after_score(db, match))
+        versioning.bump(tournament_id)
+        # One refresh for all subscribers instead of an event per match
+        event_hub.publish(tournament_id, "schedule", {
+            "phase": "scores",
+            "matches": changed_ids,
+            "filled": list(filled),
+        })
+
+    standings_delta = []
+    for team_id, (poule_id, rank, row) in _standings_positions(db, tournament_id).items():
+        previous = before.get(team_id)
+        if previous is not None and previous[1] == rank and previous[2] == row:
+            continue
+        previous_row = previous[2] if previous is not None else None
+        standings_delta.append({
+            "team_id": team_id,
+            "name": row["name"],
+            "poule_id": poule_id,
+            "rank": rank,
+            "previous_rank": previous[1] if previous is not None else None,
+            "points": row["points"],
+            "points_change": row["points"] - (previous_row["points"] if previous_row else 0),
+            "balance": row["balance"],
+            "balance_change": row["balance"] - (previous_row["balance"] if previous_row else 0),
+            "played": row["played"],
+        })
+
+    return {
+        "message": "Scores opgeslagen",
+        "results": [{**result, "version": matches[result["match_id"]].version} for result in results],
+        "standings_delta": standings_delta,
+        "knockout_filled": len(filled),
+    }
+
+
+@app.get("/tournaments/{tournament_id}/events")
+async def tournament_events(tournament_id: int):
+    """Live feed (Server-Sent Events): 'score' on every score change, 'schedule' when a phase is generated."""
+    return StreamingResponse(
+        event_hub.stream(tournament_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# -------------------- Sponsors --------------------
+ALLOWED_IMAGE_TYPES = {"image/png", "image/jpeg", "image/gif", "image/webp", "image/svg+xml"}
 
 
 def _sponsor_to_read(sponsor: Sponsor) -> dict:
@@ -1074,30 +1486,77 @@ def _sponsor_to_read(sponsor: Sponsor) -> dict:
         "tournament_id": sponsor.tournament_id,
         "name": sponsor.name,
         "url": sponsor.url,
-        "logo_url": sponsor.logo_filename,  # full Supabase public URL
+        "logo_url": sponsor.logo_filename,  # public URL from the sponsor storage
         "order": sponsor.order,
+        "logo_width": sponsor.logo_width,
+        "logo_height": sponsor.logo_height,
+        "srcset": (
+            ", ".join(f"{v['url']} {v['width']}w" for v in sponsor.logo_variants)
+            if sponsor.logo_variants else None
+        ),
     }
 
 
+async def _make_logo_variants(sponsor_id: int, storage_path: str, logo: UploadFile):
+    """
+    Background task after upload: store resized WebP variants of the logo and
+    record them with the original's dimensions on the sponsor. On failure the
+    sponsor simply keeps serving the original logo.
+    """
+    try:
+        # The spooled upload is still open here: request files are closed after background tasks
+        await logo.seek(0)
+        width, height, variants = await images.render_variants(logo.file)
+        stem = os.path.splitext(storage_path)[0]
+        stored = []
+        for variant in variants:
+            variant_url = await sponsor_storage.save(
+                f"{stem}_h{variant.height}.webp", BytesSource(variant.data), "image/webp", size=len(variant.data),
+            )
+            stored.append({"url": variant_url, "width": variant.width, "height": variant.height})
+    except Exception as e:
+        print(f"Warning: Could not create logo variants for sponsor {sponsor_id}: {e}")
+        return
+
+    async with AsyncSessionLocal() as db:
+        sponsor = await db.get(Sponsor, sponsor_id)
+        if sponsor is None:
+            # Deleted while processing
+            try:
+                for variant in stored:
+                    await sponsor_storage.delete(sponsor_storage.path_from_url(variant["url"]))
+            except StorageError as e:
+                print(f"Warning: Could not remove logo variants of deleted sponsor {sponsor_id}: {e}")
+            return
+        sponsor.logo_width, sponsor.logo_height = width, height
+        sponsor.logo_variants = stored
+        await db.commit()
+        versioning.bump(sponsor.tournament_id)
+
+
 @app.get("/tournaments/{tournament_id}/sponsors", response_model=List[SponsorRead])
-def list_sponsors(tournament_id: int, db: Session = Depends(get_db)):
-    sponsors = (
-        db.query(Sponsor)
-        .filter(Sponsor.tournament_id == tournament_id)
+async def list_sponsors(tournament_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    not_modified = _not_modified(request, response, tournament_id, "sponsors")
+    if not_modified:
+        return not_modified
+
+    sponsors = (await db.execute(
+        select(Sponsor)
+        .where(Sponsor.tournament_id == tournament_id)
         .order_by(Sponsor.order.asc(), Sponsor.id.asc())
-        .all()
-    )
+    )).scalars().all()
     return [_sponsor_to_read(s) for s in sponsors]
 
 
 @app.post("/tournaments/{tournament_id}/sponsors", response_model=SponsorRead, status_code=201)
 async def upload_sponsor(
     tournament_id: int,
+    background_tasks: BackgroundTasks,
     logo: UploadFile = File(...),
     name: str = Form(""),
     url: str = Form(""),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     if logo.content_type not in ALLOWED_IMAGE_TYPES:
         raise HTTPException(status_code=400, detail="Ongeldig bestandstype. Gebruik een afbeelding (PNG, JPG, GIF, WebP, SVG).")
@@ -1106,8 +1565,11 @@ async def upload_sponsor(
     filename = f"{uuid.uuid4().hex}{ext}"
     storage_path = f"{tournament_id}/{filename}"
 
-    file_bytes = await logo.read()
-    public_url = _supabase_upload(file_bytes, storage_path, logo.content_type)
+    # Streamed from the spooled upload; the logo is never read into memory as a whole
+    try:
+        public_url = await sponsor_storage.save(storage_path, logo, logo.content_type, size=logo.size)
+    except StorageError as e:
+        raise HTTPException(status_code=500, detail=f"Kon afbeelding niet uploaden: {e}")
 
     sponsor = Sponsor(
         tournament_id=tournament_id,
@@ -1116,28 +1578,38 @@ async def upload_sponsor(
         logo_filename=public_url,
     )
     db.add(sponsor)
-    db.commit()
-    db.refresh(sponsor)
+    await db.commit()
+    await db.refresh(sponsor)
+    versioning.bump(tournament_id)
+    if logo.content_type in images.PROCESSABLE_TYPES:
+        background_tasks.add_task(_make_logo_variants, sponsor.id, storage_path, logo)
     return _sponsor_to_read(sponsor)
 
 
 @app.delete("/sponsors/{sponsor_id}", status_code=204)
-def delete_sponsor(
+async def delete_sponsor(
     sponsor_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    sponsor = db.query(Sponsor).filter(Sponsor.id == sponsor_id).first()
+    sponsor = await db.get(Sponsor, sponsor_id)
     if not sponsor:
         raise HTTPException(status_code=404, detail="Sponsor niet gevonden")
 
     # Extract storage path from full public URL
-    if _SUPABASE_PUBLIC_PREFIX in sponsor.logo_filename:
-        storage_path = sponsor.logo_filename.split(_SUPABASE_PUBLIC_PREFIX)[-1]
-        _supabase_delete(storage_path)
-
-    db.delete(sponsor)
-    db.commit()
+    urls = [sponsor.logo_filename] + [v["url"] for v in sponsor.logo_variants or []]
+    storage_paths = [path for path in map(sponsor_storage.path_from_url, urls) if path]
+    if storage_paths:
+        try:
+            for storage_path in storage_paths:
+                await sponsor_storage.delete(storage_path)
+        except StorageError as e:
+            raise HTTPException(status_code=500, detail=f"Kon afbeelding niet verwijderen: {e}")
+
+    tournament_id = sponsor.tournament_id
+    await db.delete(sponsor)
+    await db.commit()
+    versioning.bump(tournament_id)
 
 
 
@@ -0,0 +1,123 @@
+"""
+Runtime metrics, exposed on GET /internal/metrics.
+
+MeteredQueuePool (and MeteredAsyncQueuePool for the async engine) is
+SQLAlchemy's QueuePool with a stopwatch around checkout: how long a request
+waited for a connection (including opening a new one), how many connections
+were in use at that moment, and whether the checkout had to open an overflow
+connection beyond pool_size or timed out. That is enough to size DB_POOL_SIZE /
+DB_MAX_OVERFLOW against real tournament-day traffic.
+
+Counters are per process and start at zero on every restart.
+"""
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+LATENCY_WINDOW = 1000  # most recent checkouts kept for the percentiles
+
+
+class LatencyWindow:
+    """The most recent durations (ms) of something, summarised as percentiles."""
+
+    def __init__(self, size: int = LATENCY_WINDOW):
+        self._lock = threading.Lock()
+        self._values = deque(maxlen=size)
+
+    def add(self, ms: float):
+        with self._lock:
+            self._values.append(ms)
+
+    def summary(self) -> dict:
+        with self._lock:
+            ordered = sorted(self._values)
+        if not ordered:
+            return {"p50": None, "p95": None, "max": None, "window": 0}
+        return {
+            "p50": round(ordered[len(ordered) // 2], 3),
+            "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+            "max": round(ordered[-1], 3),
+            "window": len(ordered),
+        }
+
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies = LatencyWindow()
+        self.checkouts = 0
+        self.overflow_events = 0
+        self.timeouts = 0
+        self.peak_in_use = 0
+
+    def record_checkout(self, wait_ms: float, in_use: int, overflowed: bool):
+        with self._lock:
+            self.checkouts += 1
+            self._latencies.add(wait_ms)
+            self.peak_in_use = max(self.peak_in_use, in_use)
+            if overflowed:
+                self.overflow_events += 1
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters = {
+                "checkouts": self.checkouts,
+                "overflow_events": self.overflow_events,
+                "timeouts": self.timeouts,
+                "peak_in_use": self.peak_in_use,
+            }
+        return {**counters, "checkout_ms": self._latencies.summary()}
+
+
+class _MeteredPoolMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        overflow_before = self._overflow
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.record_checkout(
+            (time.perf_counter() - started) * 1000,
+            in_use=self.checkedout(),
+            # A new connection beyond pool_size was opened for this checkout
+            overflowed=self._overflow > 0 and self._overflow > overflow_before,
+        )
+        return connection
+
+
+class MeteredQueuePool(_MeteredPoolMixin, QueuePool):
+    pass
+
+
+class MeteredAsyncQueuePool(_MeteredPoolMixin, AsyncAdaptedQueuePool):
+    """The same, for the async engine."""
+
+
+def pool_status(bind) -> dict:
+    """Configuration, current state and counters of an engine's connection pool."""
+    pool = bind.pool
+    status = {"dialect": bind.dialect.name, "pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "in_use": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+        })
+    if isinstance(pool, _MeteredPoolMixin):
+        status.update(pool.metrics.snapshot())
+    return status
@@ -0,0 +1,158 @@
+"""
+Lightweight schema migrations.
+
+Base.metadata.create_all() only creates missing tables; it never changes an
+existing one. Changes to existing tables are listed here as numbered steps and
+applied once, in order, at startup; applied versions are recorded in the
+schema_migrations table. Fresh databases run the steps too (right after
+create_all made everything), so each step checks before it adds.
+
+To change the schema: change the model, then append a step to MIGRATIONS.
+Usage (also runs on app startup):
+    python -m backend.migrations
+"""
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, insert, inspect, literal, or_, select, text, update
+
+from backend.database import Base, engine
+from backend.models import Match, Poule, Round, ScoreEvent, Sponsor, Team
+from backend.scores import SCORE_FIELDS
+
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def add_column(conn, column):
+    """ALTER TABLE ... ADD COLUMN for a (nullable) model column, unless it already exists."""
+    table = column.table
+    if column.name in {c["name"] for c in inspect(conn).get_columns(table.name)}:
+        return
+    quote = conn.dialect.identifier_preparer.quote
+    ddl = f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column.type.compile(conn.dialect)}"
+    for fk in column.foreign_keys:
+        ddl += f" REFERENCES {quote(fk.column.table.name)}({quote(fk.column.name)})"
+        if fk.ondelete:
+            ddl += f" ON DELETE {fk.ondelete}"
+    conn.execute(text(ddl))
+
+
+def create_indexes(conn, model):
+    """Create the indexes declared on a model that the database doesn't have yet."""
+    for index in model.__table__.indexes:
+        index.create(conn, checkfirst=True)
+
+
+def _bracket_links(conn):
+    add_column(conn, Match.__table__.c.home_winner_of_id)
+    add_column(conn, Match.__table__.c.away_winner_of_id)
+
+
+def _query_indexes(conn):
+    for model in (Poule, Team, Round, Match, Sponsor):
+        create_indexes(conn, model)
+
+
+def _sponsor_logo_variants(conn):
+    add_column(conn, Sponsor.__table__.c.logo_width)
+    add_column(conn, Sponsor.__table__.c.logo_height)
+    add_column(conn, Sponsor.__table__.c.logo_variants)
+
+
+def _match_versions(conn):
+    add_column(conn, Match.__table__.c.version)
+    conn.execute(text("UPDATE matches SET version = 0 WHERE version IS NULL"))
+
+
+def _score_events(conn):
+    ScoreEvent.__table__.create(conn, checkfirst=True)
+    create_indexes(conn, ScoreEvent)
+    # Scores entered before the log existed: one event with the current scores,
+    # so replays end at the stored state (history starts at this migration)
+    conn.execute(insert(ScoreEvent).from_select(
+        ["tournament_id", "match_id", "version", *SCORE_FIELDS, "created_at"],
+        select(
+            Match.tournament_id, Match.id, Match.version,
+            *(getattr(Match, field) for field in SCORE_FIELDS),
+            literal(datetime.utcnow(), DateTime),
+        ).where(
+            or_(*(getattr(Match, field).isnot(None) for field in SCORE_FIELDS)),
+            Match.id.notin_(select(ScoreEvent.match_id)),
+        ),
+    ))
+
+
+def _legacy_final_links(conn):
+    # Finals planned before the bracket links took the winners of the #1 vs #1
+    # knockout matches; link them to those so the bracket graph can fill them
+    finals = conn.execute(
+        select(Match.id, Round.tournament_id)
+        .join(Round, Match.round_id == Round.id)
+        .where(
+            Round.type == "final",
+            Match.home_winner_of_id.is_(None), Match.away_winner_of_id.is_(None),
+            Match.home_rank_poule_id.is_(None), Match.away_rank_poule_id.is_(None),
+        )
+    ).all()
+    for final_id, tournament_id in finals:
+        feeders = conn.execute(
+            select(Match.id)
+            .join(Round, Match.round_id == Round.id)
+            .where(
+                Round.tournament_id == tournament_id,
+                Round.type == "knockout",
+                Match.home_rank_position == 1,
+                Match.away_rank_position == 1,
+            )
+            .order_by(Match.id)
+            .limit(2)
+        ).scalars().all()
+        if len(feeders) == 2:
+            conn.execute(
+                update(Match.__table__)
+                .where(Match.__table__.c.id == final_id)
+                .values(home_winner_of_id=feeders[0], away_winner_of_id=feeders[1])
+            )
+
+
+MIGRATIONS = [
+    (1, "knockout bracket links on matches", _bracket_links),
+    (2, "composite indexes for the hot query shapes", _query_indexes),
+    (3, "sponsor logo dimensions and resized variants", _sponsor_logo_variants),
+    (4, "score version on matches", _match_versions),
+    (5, "append-only score event log", _score_events),
+    (6, "bracket links on finals planned before migration 1", _legacy_final_links),
+]
+
+
+def run_migrations(bind=engine):
+    """Apply pending migrations, each in its own transaction. Returns the versions applied."""
+    schema_migrations.create(bind, checkfirst=True)
+    with bind.connect() as conn:
+        applied = set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+    done = []
+    for version, description, step in MIGRATIONS:
+        if version in applied:
+            continue
+        with bind.begin() as conn:
+            step(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=version, description=description, applied_at=datetime.utcnow(),
+            ))
+        done.append(version)
+    return done
+
+
+if __name__ == "__main__":
+    Base.metadata.create_all(bind=engine)
+    applied = run_migrations()
+    if applied:
+        print(f"✓ Applied migrations: {', '.join(str(v) for v in applied)}")
+    else:
+        print("✓ Database schema is up to date.")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index, JSON
 from sqlalchemy.orm import relationship
 from backend.database import Base
 
@@ -39,6 +39,10 @@ class Poule(Base):
     tournament = relationship("Tournament", back_populates="poules")
     teams = relationship("Team", back_populates="poule", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_poules_tournament_id", "tournament_id"),
+    )
+
 
 class Team(Base):
     __tablename__ = "teams"
@@ -52,6 +56,10 @@ class Team(Base):
     tournament = relationship("Tournament", back_populates="teams")
     poule = relationship("Poule", back_populates="teams")
 
+    __table_args__ = (
+        Index("ix_teams_tournament_poule", "tournament_id", "poule_id"),
+    )
+
 
 class Round(Base):
     __tablename__ = "rounds"
@@ -67,6 +75,12 @@ class Round(Base):
     tournament = relationship("Tournament", back_populates="rounds")
     matches = relationship("Match", back_populates="round", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Schedule listing (ordered by round number) and phase lookups (type, then order)
+        Index("ix_rounds_tournament_number", "tournament_id", "round_number"),
+        Index("ix_rounds_tournament_type_number", "tournament_id", "type", "round_number"),
+    )
+
 
 class Match(Base):
     __tablename__ = "matches"
@@ -91,6 +105,10 @@ class Match(Base):
     away_rank_poule_id = Column(Integer, ForeignKey("poules.id"), nullable=True)
     away_rank_position = Column(Integer, nullable=True)
 
+    # Later knockout stages: filled with the winner of another match
+    home_winner_of_id = Column(Integer, ForeignKey("matches.id", ondelete="SET NULL"), nullable=True)
+    away_winner_of_id = Column(Integer, ForeignKey("matches.id", ondelete="SET NULL"), nullable=True)
+
     # Set 1 scores
     home_set1_score = Column(Integer, nullable=True)
     away_set1_score = Column(Integer, nullable=True)
@@ -99,6 +117,9 @@ class Match(Base):
     home_set2_score = Column(Integer, nullable=True)
     away_set2_score = Column(Integer, nullable=True)
 
+    # Bumped on every score write; score writes can be made conditional on it
+    version = Column(Integer, nullable=False, default=0)
+
 
     tournament = relationship("Tournament", back_populates="matches")
     round = relationship("Round", back_populates="matches")
@@ -111,6 +132,39 @@ class Match(Base):
     home_rank_poule = relationship("Poule", foreign_keys=[home_rank_poule_id])
     away_rank_poule = relationship("Poule", foreign_keys=[away_rank_poule_id])
 
+    __table_args__ = (
+        # Standings / phase status: a tournament's poule matches
+        Index("ix_matches_tournament_poule", "tournament_id", "poule_id"),
+        # Per-poule checks (is the poule complete?)
+        Index("ix_matches_poule_id", "poule_id"),
+        # Matches of a round (joins from rounds, IN lists), in field order
+        Index("ix_matches_round_field", "round_id", "field_number"),
+    )
+
+
+class ScoreEvent(Base):
+    """Append-only log of score writes: the match's set scores and version after each write."""
+    __tablename__ = "score_events"
+
+    id = Column(Integer, primary_key=True)
+    tournament_id = Column(Integer, ForeignKey("tournaments.id", ondelete="CASCADE"), nullable=False)
+    match_id = Column(Integer, ForeignKey("matches.id", ondelete="CASCADE"), nullable=False)
+    version = Column(Integer, nullable=False)
+
+    home_set1_score = Column(Integer, nullable=True)
+    away_set1_score = Column(Integer, nullable=True)
+    home_set2_score = Column(Integer, nullable=True)
+    away_set2_score = Column(Integer, nullable=True)
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime, nullable=False)  # UTC
+
+    __table_args__ = (
+        # Replay: a tournament's events up to a moment
+        Index("ix_score_events_tournament_created", "tournament_id", "created_at"),
+        Index("ix_score_events_match_id", "match_id"),
+    )
+
 
 class Sponsor(Base):
     __tablename__ = "sponsors"
@@ -121,6 +175,14 @@ class Sponsor(Base):
     url = Column(String, nullable=True)
     logo_filename = Column(String, nullable=False)
     order = Column(Integer, default=0)
+    # Filled in after upload by the logo worker (backend/images.py); empty for SVGs and until processed
+    logo_width = Column(Integer, nullable=True)
+    logo_height = Column(Integer, nullable=True)
+    logo_variants = Column(JSON, nullable=True)  # [{"url", "width", "height"}] WebP, smallest first
 
     tournament = relationship("Tournament", back_populates="sponsors")
 
+    __table_args__ = (
+        Index("ix_sponsors_tournament_order", "tournament_id", "order"),
+    )
+
@@ -0,0 +1,620 @@
+"""
+Pure scheduling engine.
+
+Takes plain descriptors (poules with their team ids, field count and timing
+settings) and returns an immutable plan of rounds and matches. There is no
+database access in here, so schedules can be dry-run, previewed and
+benchmarked without SQLAlchemy; backend.schedule adapts plans to the ORM.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+# Gap between the end of the last group match and the first knockout match
+GROUP_KNOCKOUT_BREAK_MINUTES = 15
+
+# Group phase slot builders:
+# - "rounds": one match per poule per pass, chunked by number of fields (the classic schedule)
+# - "packed": fill every field in every slot from any poule, as long as no team plays twice
+SCHEDULE_MODES = ("rounds", "packed")
+
+
+@dataclass(frozen=True)
+class PouleSpec:
+    id: int
+    team_ids: Tuple[int, ...]
+
+
+@dataclass(frozen=True)
+class ScheduleSettings:
+    num_fields: int
+    match_duration_minutes: int
+    break_duration_minutes: int
+    start_time: str  # format HH:MM
+
+
+@dataclass(frozen=True)
+class PlanOptions:
+    mode: str = "rounds"  # see SCHEDULE_MODES
+    # Minimum number of slots a team sits out between two group matches (0 = no constraint)
+    min_rest_slots: int = 0
+    # Prefer scorekeepers that don't play in the slot right before or after
+    avoid_adjacent_referee: bool = False
+
+
+@dataclass(frozen=True)
+class PlannedMatch:
+    field_number: int
+    poule_id: Optional[int] = None
+    home_team_id: Optional[int] = None
+    away_team_id: Optional[int] = None
+    referee_team_id: Optional[int] = None
+    # Knockout placeholders: team at this rank in that poule
+    home_rank_poule_id: Optional[int] = None
+    home_rank_position: Optional[int] = None
+    away_rank_poule_id: Optional[int] = None
+    away_rank_position: Optional[int] = None
+    # Later bracket stages: winner of the match at (round_number, field_number)
+    home_winner_of: Optional[Tuple[int, int]] = None
+    away_winner_of: Optional[Tuple[int, int]] = None
+
+
+@dataclass(frozen=True)
+class BracketMatch:
+    """
+    One knockout match in a bracket. Each side is either a poule seed
+    (poule_id, position) or the winner of an earlier bracket match (its key).
+    """
+    key: int
+    rank: int   # group rank whose teams play this bracket (1 = title bracket)
+    stage: int  # 1 = first knockout round of the bracket
+    home_seed: Optional[Tuple[int, int]] = None
+    away_seed: Optional[Tuple[int, int]] = None
+    home_winner_of: Optional[int] = None
+    away_winner_of: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class PlannedRound:
+    round_number: int
+    type: str  # group | knockout | final
+    start_time: datetime
+    end_time: datetime
+    matches: Tuple[PlannedMatch, ...]
+
+
+@dataclass(frozen=True)
+class SchedulePlan:
+    rounds: Tuple[PlannedRound, ...]
+
+    @property
+    def end_time(self) -> Optional[datetime]:
+        return self.rounds[-1].end_time if self.rounds else None
+
+    def rounds_of_type(self, round_type: str) -> List[PlannedRound]:
+        return [r for r in self.rounds if r.type == round_type]
+
+
+def round_robin(team_ids: Sequence[int]) -> List[Tuple[int, int]]:
+    """All pairings of a poule in circle-method order (odd poules get a bye per round)."""
+    team_list = list(team_ids)
+    if len(team_list) < 2:
+        return []
+    if len(team_list) % 2 == 1:
+        team_list.append(None)
+
+    n = len(team_list)
+    matches = []
+    for _ in range(n - 1):
+        for i in range(n // 2):
+            t1 = team_list[i]
+            t2 = team_list[n - 1 - i]
+            if t1 is not None and t2 is not None:
+                matches.append((t1, t2))
+        # rotate
+        team_list = [team_list[0]] + [team_list[-1]] + team_list[1:-1]
+    return matches
+
+
+def _pick_referee(candidates, playing, referee_count, allowed=None) -> Optional[int]:
+    """Least-used candidate that isn't playing (and passes `allowed`); ties go to the first candidate."""
+    best = None
+    for tid in candidates:
+        if tid in playing or (allowed is not None and not allowed(tid)):
+            continue
+        if best is None or referee_count[tid] < referee_count[best]:
+            best = tid
+    return best
+
+
+class _SlotBits:
+    """Per-team bitsets of the slots a team plays in, for O(1) rest/adjacency checks."""
+
+    def __init__(self, team_ids):
+        self.bits = {tid: 0 for tid in team_ids}
+
+    def add(self, tid, slot_index):
+        self.bits[tid] |= 1 << slot_index
+
+    def rested(self, tid, slot_index, min_rest_slots) -> bool:
+        """True if the team didn't play in the `min_rest_slots` slots before this one."""
+        if not min_rest_slots:
+            return True
+        low = max(slot_index - min_rest_slots, 0)
+        window = ((1 << (slot_index - low)) - 1) << low
+        return not self.bits[tid] & window
+
+    def plays_adjacent(self, tid, slot_index) -> bool:
+        """True if the team plays in the slot right before or after this one."""
+        window = (1 << (slot_index + 1)) | ((1 << (slot_index - 1)) if slot_index else 0)
+        return bool(self.bits[tid] & window)
+
+
+def _assign_referees(slots, team_ids_by_poule, all_team_ids, bits, options):
+    """
+    Scorekeepers per time slot: a team that is neither playing nor keeping score
+    elsewhere in the slot, least-used first, preferring the match's own poule.
+    Poules without a free team (e.g. poules of two) fall back to any idle team.
+    With avoid_adjacent_referee, teams that play right before or after the slot
+    are only used when nobody else is available.
+    Returns slots of [(poule_id, home_id, away_id, referee_id)].
+    """
+    referee_count = {tid: 0 for tid in all_team_ids}
+    result = []
+    for slot_index, slot_matches in enumerate(slots):
+        busy = {tid for _, home, away in slot_matches for tid in (home, away)}
+        if options.avoid_adjacent_referee:
+            not_adjacent = lambda tid, s=slot_index: not bits.plays_adjacent(tid, s)
+            preferences = [(True, not_adjacent), (False, not_adjacent), (True, None), (False, None)]
+        else:
+            preferences = [(True, None), (False, None)]
+        slot = []
+        for poule_id, home, away in slot_matches:
+            referee = None
+            for own_poule, allowed in preferences:
+                candidates = team_ids_by_poule[poule_id] if own_poule else all_team_ids
+                referee = _pick_referee(candidates, busy, referee_count, allowed)
+                if referee is not None:
+                    break
+            if referee is not None:
+                referee_count[referee] += 1
+                busy.add(referee)
+            slot.append((poule_id, home, away, referee))
+        result.append(slot)
+    return result
+
+
+def plan_group_slots(poules: Sequence[PouleSpec], num_fields: int, options: PlanOptions = PlanOptions(),
+                     assign_referees: bool = True):
+    """
+    Group phase time slots, each a list of (poule_id, home_id, away_id, referee_id).
+
+    "rounds": each pass takes the next match of every poule, split into chunks of at
+    most num_fields. "packed": every slot is filled up to num_fields, taking matches
+    from the poules with the most matches left first, skipping matches whose teams
+    already play in that slot, and only as long as enough teams stay free to keep score.
+
+    In both modes a poule's next match is the first pending one whose teams have had
+    `min_rest_slots` slots of rest. If no pending match allows that, the rest rule is
+    relaxed for that slot rather than leaving it empty (see plan_stats for violations).
+    With assign_referees=False the slots hold (poule_id, home_id, away_id) only.
+    """
+    mode = options.mode
+    if mode not in SCHEDULE_MODES:
+        raise ValueError(f"Onbekende planningsmodus: {mode}")
+    min_rest = options.min_rest_slots
+
+    pending = {p.id: round_robin(p.team_ids) for p in poules}
+    team_ids_by_poule = {p.id: p.team_ids for p in poules}
+    all_team_ids = [tid for p in poules for tid in p.team_ids]
+    bits = _SlotBits(all_team_ids)
+
+    def fits(home, away, slot_index):
+        return bits.rested(home, slot_index, min_rest) and bits.rested(away, slot_index, min_rest)
+
+    def place(home, away, slot_index):
+        bits.add(home, slot_index)
+        bits.add(away, slot_index)
+
+    slots = []
+    if mode == "rounds":
+        while True:
+            round_matches = []
+            for poule in poules:
+                queue = pending[poule.id]
+                if not queue:
+                    continue
+                slot_index = len(slots) + len(round_matches) // num_fields
+                idx = next((i for i, (h, a) in enumerate(queue) if fits(h, a, slot_index)), 0)
+                home, away = queue.pop(idx)
+                place(home, away, slot_index)
+                round_matches.append((poule.id, home, away))
+            if not round_matches:
+                break
+
+            # Split into chunks if more matches than fields
+            for i in range(0, len(round_matches), num_fields):
+                slots.append(round_matches[i:i + num_fields])
+        if not assign_referees:
+            return slots
+        return _assign_referees(slots, team_ids_by_poule, all_team_ids, bits, options)
+
+    total_teams = len(all_team_ids)
+    while any(pending.values()):
+        slot_index = len(slots)
+        busy = set()
+        slot_matches = []
+        # Poules with the longest queue first: they determine when the group phase ends
+        by_queue_length = sorted(poules, key=lambda p: len(pending[p.id]), reverse=True)
+        for poule in by_queue_length:
+            queue = pending[poule.id]
+            idx = 0
+            while idx < len(queue) and len(slot_matches) < num_fields:
+                home, away = queue[idx]
+                # Every match in the slot (this one included) needs a free scorekeeper
+                no_referee_left = slot_matches and total_teams - len(busy) - 2 < len(slot_matches) + 1
+                if home in busy or away in busy or no_referee_left or not fits(home, away, slot_index):
+                    idx += 1
+                    continue
+                queue.pop(idx)
+                place(home, away, slot_index)
+                busy.update((home, away))
+                slot_matches.append((poule.id, home, away))
+            if len(slot_matches) >= num_fields:
+                break
+        if not slot_matches:
+            # Nothing is rested enough: relax the rest rule for this slot
+            queue = pending[by_queue_length[0].id]
+            home, away = queue.pop(0)
+            place(home, away, slot_index)
+            slot_matches.append((by_queue_length[0].id, home, away))
+        slots.append(slot_matches)
+    if not assign_referees:
+        return slots
+    return _assign_referees(slots, team_ids_by_poule, all_team_ids, bits, options)
+
+
+def plan_bracket(poules: Sequence[PouleSpec]) -> List[BracketMatch]:
+    """
+    Single-elimination brackets, one per group rank: all #1 teams play the title
+    bracket (its last match is the final), all #2 teams a placement bracket, and
+    so on. Seeds keep poule order, so with four poules the first stage is still
+    A-B and C-D. With a seed count that isn't a power of two, the first stage
+    only plays as many matches as needed to reach one; the remaining seeds get a
+    bye into stage 2. Ranks held by a single team get no bracket.
+    Returned ordered by (rank, stage, pairing).
+    """
+    matches = []
+    max_rank = max((len(p.team_ids) for p in poules), default=0)
+    for rank in range(1, max_rank + 1):
+        # ("seed", (poule_id, rank)) or ("winner", key)
+        entrants = [("seed", (p.id, rank)) for p in poules if len(p.team_ids) >= rank]
+        stage = 1
+        while len(entrants) > 1:
+            bracket_size = 1 << (len(entrants) - 1).bit_length()
+            num_matches = len(entrants) - bracket_size // 2
+            advancing = []
+            for i in range(num_matches):
+                (home_kind, home), (away_kind, away) = entrants[2 * i], entrants[2 * i + 1]
+                match = BracketMatch(
+                    key=len(matches),
+                    rank=rank,
+                    stage=stage,
+                    home_seed=home if home_kind == "seed" else None,
+                    away_seed=away if away_kind == "seed" else None,
+                    home_winner_of=home if home_kind == "winner" else None,
+                    away_winner_of=away if away_kind == "winner" else None,
+                )
+                matches.append(match)
+                advancing.append(("winner", match.key))
+            entrants = advancing + entrants[2 * num_matches:]
+            stage += 1
+    return matches
+
+
+def title_final(bracket: Sequence[BracketMatch]) -> Optional[BracketMatch]:
+    """The last match of the rank 1 bracket, or None if there is no bracket."""
+    title = [m for m in bracket if m.rank == 1]
+    return title[-1] if title else None
+
+
+def schedule_knockout(bracket: Sequence[BracketMatch], num_fields: int) -> List[List[BracketMatch]]:
+    """
+    Knockout rounds, without the final (which gets its own round). Matches are taken
+    stage by stage, ranks in order within a stage; each goes into the first round
+    after the rounds of the matches it takes its winners from that has a free field.
+    """
+    final = title_final(bracket)
+    round_of = {}  # bracket key -> round index
+    rounds = []
+    # Round index -> itself while it has a free field, otherwise a later round to
+    # look at; followed with path compression, so full rounds are skipped in
+    # near-constant time instead of being rescanned for every match
+    next_free = []
+
+    def first_free(idx):
+        root = idx
+        while root < len(rounds) and next_free[root] != root:
+            root = next_free[root]
+        while idx < len(rounds) and next_free[idx] != idx:
+            next_free[idx], idx = root, next_free[idx]
+        return root
+
+    for m in sorted(bracket, key=lambda m: m.stage):
+        if m is final:
+            continue
+        feeders = [k for k in (m.home_winner_of, m.away_winner_of) if k is not None]
+        idx = first_free(max((round_of[k] + 1 for k in feeders), default=0))
+        if idx == len(rounds):
+            rounds.append([])
+            next_free.append(idx)
+        rounds[idx].append(m)
+        if len(rounds[idx]) >= num_fields:
+            next_free[idx] = idx + 1
+        round_of[m.key] = idx
+    return rounds
+
+
+def plan_schedule(poules: Sequence[PouleSpec], settings: ScheduleSettings,
+                  options: PlanOptions = PlanOptions()) -> SchedulePlan:
+    """Full day plan: group rounds, knockout placeholder rounds and a final placeholder."""
+    fields = settings.num_fields
+    match_duration = timedelta(minutes=settings.match_duration_minutes)
+    slot_duration = timedelta(minutes=settings.match_duration_minutes + settings.break_duration_minutes)
+    current_time = datetime.strptime(settings.start_time, "%H:%M")
+
+    rounds = []
+
+    def add_round(round_type, matches):
+        rounds.append(PlannedRound(
+            round_number=len(rounds) + 1,
+            type=round_type,
+            start_time=current_time,
+            end_time=current_time + match_duration,
+            matches=tuple(matches),
+        ))
+
+    for slot in plan_group_slots(poules, fields, options):
+        add_round("group", [
+            PlannedMatch(
+                field_number=field_index + 1,
+                poule_id=poule_id,
+                home_team_id=home,
+                away_team_id=away,
+                referee_team_id=referee,
+            )
+            for field_index, (poule_id, home, away, referee) in enumerate(slot)
+        ])
+        current_time += slot_duration
+
+    # Break between group phase and knockout phase. Subtract break_duration to compensate
+    # for what was already added after the last group round, so the net gap from
+    # end-of-last-group-match to start-of-first-knockout-match is exactly 15 min.
+    current_time += timedelta(minutes=GROUP_KNOCKOUT_BREAK_MINUTES - settings.break_duration_minutes)
+
+    # Knockout placeholders; a match is always planned after the matches it takes
+    # its teams from. Teams are filled in once poules and earlier matches finish.
+    bracket = plan_bracket(poules)
+    positions = {}  # bracket key -> (round_number, field_number)
+
+    def placeholder(bm: BracketMatch, field_number: int) -> PlannedMatch:
+        positions[bm.key] = (len(rounds) + 1, field_number)
+        return PlannedMatch(
+            field_number=field_number,
+            home_rank_poule_id=bm.home_seed[0] if bm.home_seed else None,
+            home_rank_position=bm.home_seed[1] if bm.home_seed else None,
+            away_rank_poule_id=bm.away_seed[0] if bm.away_seed else None,
+            away_rank_position=bm.away_seed[1] if bm.away_seed else None,
+            home_winner_of=positions.get(bm.home_winner_of),
+            away_winner_of=positions.get(bm.away_winner_of),
+        )
+
+    for knockout_round in schedule_knockout(bracket, fields):
+        add_round("knockout", [
+            placeholder(bm, field_index + 1)
+            for field_index, bm in enumerate(knockout_round)
+        ])
+        current_time += slot_duration
+
+    # Single final match after all knockout rounds
+    final = title_final(bracket)
+    if final:
+        add_round("final", [placeholder(final, 1)])
+
+    return SchedulePlan(rounds=tuple(rounds))
+
+
+@lru_cache(maxsize=256)
+def cached_plan(poules: Tuple[PouleSpec, ...], settings: ScheduleSettings,
+                options: PlanOptions = PlanOptions()) -> SchedulePlan:
+    """
+    Memoised plan_schedule. All inputs are frozen dataclasses/tuples, so the key is
+    exactly (team set + poule assignment, tournament settings, options) and plans
+    are immutable, safe to share between requests.
+    """
+    return plan_schedule(poules, settings, options)
+
+
+@dataclass(frozen=True)
+class PlanShape:
+    group_rounds: int
+    knockout_rounds: int
+    final_rounds: int
+    end_time: datetime
+
+    @property
+    def total_rounds(self) -> int:
+        return self.group_rounds + self.knockout_rounds + self.final_rounds
+
+
+def _group_slot_count(poule_sizes: Tuple[int, ...], num_fields: int, options: PlanOptions) -> int:
+    if options.mode == "rounds":
+        # The rounds builder takes one pending match per poule per pass and chunks each
+        # pass by num_fields; the rest rule only changes *which* match is taken, never
+        # how many, so replaying the loop on queue lengths gives the exact slot count.
+        queue_lengths = [size * (size - 1) // 2 for size in poule_sizes]
+        passes = max(queue_lengths, default=0)
+        return sum(
+            -(-sum(1 for length in queue_lengths if length > k) // num_fields)
+            for k in range(passes)
+        )
+    # Packed slots depend on which teams clash, so run the real packer on stand-in ids
+    poules, next_id = [], 1
+    for i, size in enumerate(poule_sizes):
+        poules.append(PouleSpec(id=i + 1, team_ids=tuple(range(next_id, next_id + size))))
+        next_id += size
+    return len(plan_group_slots(poules, num_fields, options, assign_referees=False))
+
+
+@lru_cache(maxsize=4096)
+def plan_shape(poule_sizes: Tuple[int, ...], settings: ScheduleSettings,
+               options: PlanOptions = PlanOptions()) -> PlanShape:
+    """
+    Round counts and end time that plan_schedule would produce for poules of these
+    sizes, without building matches or assigning scorekeepers. Used to compare many
+    candidate setups quickly; the result equals the full plan's.
+    """
+    group_rounds = _group_slot_count(poule_sizes, settings.num_fields, options)
+    # The bracket only depends on poule sizes, so stand-in team ids will do
+    bracket = plan_bracket([PouleSpec(id=i, team_ids=tuple(range(size))) for i, size in enumerate(poule_sizes)])
+    knockout_rounds = len(schedule_knockout(bracket, settings.num_fields))
+    final_rounds = 1 if bracket else 0
+
+    # Mirror plan_schedule's clock: slots, the group/knockout break, then the last match
+    slot = settings.match_duration_minutes + settings.break_duration_minutes
+    minutes = group_rounds * slot
+    if knockout_rounds or final_rounds:
+        minutes += GROUP_KNOCKOUT_BREAK_MINUTES - settings.break_duration_minutes
+        minutes += (knockout_rounds + final_rounds - 1) * slot + settings.match_duration_minutes
+    else:
+        minutes -= settings.break_duration_minutes
+    end_time = datetime.strptime(settings.start_time, "%H:%M") + timedelta(minutes=minutes)
+    return PlanShape(group_rounds, knockout_rounds, final_rounds, end_time)
+
+
+def min_total_rounds(poule_sizes: Tuple[int, ...], num_fields: int,
+                     options: PlanOptions = PlanOptions()) -> int:
+    """
+    Lower bound on plan_shape(...).total_rounds, from counting alone: cheap enough
+    to rule out candidate setups before running the dry-run on them.
+    """
+    if options.mode == "rounds":
+        group_rounds = _group_slot_count(poule_sizes, num_fields, options)  # exact, and cheap
+    else:
+        # A slot holds at most num_fields matches, and at most size // 2 of one poule
+        matches = [size * (size - 1) // 2 for size in poule_sizes]
+        group_rounds = max(
+            [-(-sum(matches) // num_fields)]
+            + [-(-m // min(size // 2, num_fields)) for size, m in zip(poule_sizes, matches) if m]
+        )
+
+    # One bracket per rank held by at least two teams (see plan_bracket)
+    entrants = [sum(1 for size in poule_sizes if size >= rank) for rank in range(1, max(poule_sizes, default=0) + 1)]
+    entrants = [count for count in entrants if count > 1]
+    if not entrants:
+        return group_rounds
+    knockout_matches = sum(count - 1 for count in entrants) - 1  # the final gets its own round
+    # Stages run one after another; the title bracket's last stage is the final
+    depth = max((count - 1).bit_length() - (1 if rank == 0 else 0) for rank, count in enumerate(entrants))
+    return group_rounds + max(-(-knockout_matches // num_fields), depth) + 1
+
+
+def split_into_poules(team_ids: Sequence[int], num_poules: int) -> List[Tuple[int, ...]]:
+    """Deterministic even split in the same sizes auto-distribute uses (larger poules first)."""
+    base_size, extra = divmod(len(team_ids), num_poules)
+    result, idx = [], 0
+    for i in range(num_poules):
+        size = base_size + (1 if i < extra else 0)
+        result.append(tuple(team_ids[idx:idx + size]))
+        idx += size
+    return result
+
+
+def plan_stats(plan: SchedulePlan, num_fields: int, min_rest_slots: int = 0) -> dict:
+    """
+    End time and field utilisation (share of field slots used) of a plan, plus
+    group phase rest figures: back-to-back matches, matches with less than
+    `min_rest_slots` rest, and scorekeeper duties right next to a team's own match.
+    """
+    group_rounds = plan.rounds_of_type("group")
+    group_matches = sum(len(r.matches) for r in group_rounds)
+    all_matches = sum(len(r.matches) for r in plan.rounds)
+
+    playing_slots = {}
+    referee_slots = []
+    for slot_index, rnd in enumerate(group_rounds):
+        for m in rnd.matches:
+            for tid in (m.home_team_id, m.away_team_id):
+                playing_slots.setdefault(tid, []).append(slot_index)
+            if m.referee_team_id:
+                referee_slots.append((m.referee_team_id, slot_index))
+    gaps = [b - a - 1 for slots in playing_slots.values() for a, b in zip(slots, slots[1:])]
+    plays = {tid: set(slots) for tid, slots in playing_slots.items()}
+    adjacent_duties = sum(
+        1 for tid, s in referee_slots
+        if (s - 1) in plays.get(tid, ()) or (s + 1) in plays.get(tid, ())
+    )
+
+    return {
+        "end_time": plan.end_time.strftime("%H:%M") if plan.end_time else None,
+        "total_rounds": len(plan.rounds),
+        "group_rounds": len(group_rounds),
+        "group_field_utilisation": round(group_matches / (len(group_rounds) * num_fields), 3) if group_rounds else None,
+        "field_utilisation": round(all_matches / (len(plan.rounds) * num_fields), 3) if plan.rounds else None,
+        "back_to_back_matches": sum(1 for g in gaps if g == 0),
+        "rest_violations": sum(1 for g in gaps if g < min_rest_slots),
+        "adjacent_referee_duties": adjacent_duties,
+    }
+
+
+def assign_knockout_referees(rounds: Sequence[Sequence[Tuple[Optional[int], Optional[int]]]],
+                             team_ids: Sequence[int],
+                             referee_count: Dict[int, int],
+                             current: Optional[Sequence[Sequence[Optional[int]]]] = None,
+                             entrants: Optional[Sequence[Set[int]]] = None) -> List[List[Optional[int]]]:
+    """
+    Scorekeepers for knockout rounds: a team that does not play or keep score in that
+    round and has kept score least so far. `rounds` holds (home_id, away_id) per match,
+    `current` the referees already assigned (kept unless they turn out to play in that
+    round) and `entrants` per round the teams that may still play in it, since a round
+    can mix matches whose teams are known with ones still waiting for them. Returns
+    the referee per match, or None where none can be assigned (teams unknown, nobody free).
+    """
+    counts = dict(referee_count)
+    for tid in team_ids:
+        counts.setdefault(tid, 0)
+
+    result = []
+    for round_index, round_matches in enumerate(rounds):
+        playing = {tid for match in round_matches for tid in match if tid}
+        existing = [
+            None if ref in playing else ref
+            for ref in (current[round_index] if current else [None] * len(round_matches))
+        ]
+        busy = playing | {ref for ref in existing if ref}
+        if entrants:
+            busy |= entrants[round_index]
+        referees = []
+        for (home, away), referee in zip(round_matches, existing):
+            if referee is None and home and away:
+                referee = _pick_referee(team_ids, busy, counts)
+                if referee is not None:
+                    counts[referee] += 1
+                    busy.add(referee)
+            referees.append(referee)
+        result.append(referees)
+    return result
+
+
+def match_winner(h1, a1, h2, a2) -> Optional[str]:
+    """'home' or 'away' from set scores: more sets won; if 1-1, higher total set points. None on a full tie."""
+    h1, a1, h2, a2 = h1 or 0, a1 or 0, h2 or 0, a2 or 0
+    home_sets = (1 if h1 > a1 else 0) + (1 if h2 > a2 else 0)
+    away_sets = (1 if a1 > h1 else 0) + (1 if a2 > h2 else 0)
+    if home_sets != away_sets:
+        return "home" if home_sets > away_sets else "away"
+    # 1-1 sets: tie-break by total points scored in sets
+    if (h1 + h2) != (a1 + a2):
+        return "home" if (h1 + h2) > (a1 + a2) else "away"
+    return None
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 
 # Tournament
 class TournamentBase(BaseModel):
@@ -77,8 +77,32 @@ class SponsorRead(BaseModel):
     url: Optional[str]
     logo_url: str
     order: int
+    logo_width: Optional[int] = None
+    logo_height: Optional[int] = None
+    srcset: Optional[str] = None  # resized WebP variants, "<url> <width>w, ..."
 
     model_config = {
         "from_attributes": True
     }
 
+# Schedule preview
+class SchedulePreviewRequest(BaseModel):
+    num_poules: Optional[int] = None  # preview an even split over this many poules
+    poules: Optional[List[List[int]]] = None  # or an explicit assignment: team ids per poule
+    mode: str = "rounds"
+    min_rest_slots: int = 0
+    avoid_adjacent_referee: bool = False
+
+# Scores
+class ScoreWrite(BaseModel):
+    home_set1_score: Optional[int] = Field(default=None, ge=0)
+    away_set1_score: Optional[int] = Field(default=None, ge=0)
+    home_set2_score: Optional[int] = Field(default=None, ge=0)
+    away_set2_score: Optional[int] = Field(default=None, ge=0)
+    version: Optional[int] = None  # match version the scores are based on; 409 if it changed since
+
+class ScoreUpdate(ScoreWrite):
+    match_id: int
+
+class BulkScoreRequest(BaseModel):
+    scores: List[ScoreUpdate] = Field(min_length=1, max_length=500)
@@ -0,0 +1,54 @@
+"""
+Score writes.
+
+Every match carries a version that is bumped on each score write. A write can
+name the version it was based on (the version the client saw when it loaded
+the match); it then only goes through if the match is still at that version,
+checked by the UPDATE itself so two concurrent writers can't both win. A write
+that lost is reported as a conflict instead of silently overwriting the other
+score.
+
+Each write also appends the match's new scores and version to score_events,
+in the same transaction, so corrections stay on record and the scores at any
+moment can be replayed (backend/replay.py).
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DateTime, Integer, insert, literal, select, update
+from sqlalchemy.orm import Session
+
+from backend.models import Match, ScoreEvent
+
+SCORE_FIELDS = ("home_set1_score", "away_set1_score", "home_set2_score", "away_set2_score")
+
+
+def write_score(db: Session, match_id: int, scores: dict, expected_version: Optional[int] = None,
+                user_id: Optional[int] = None) -> bool:
+    """
+    Set a match's four set scores, bump its version and log the write, without
+    committing. With expected_version, only if the match is still at that
+    version; returns False (and writes nothing) if it is not.
+    """
+    conditions = [Match.id == match_id]
+    if expected_version is not None:
+        conditions.append(Match.version == expected_version)
+    result = db.execute(
+        update(Match)
+        .where(*conditions)
+        .values(**{field: scores.get(field) for field in SCORE_FIELDS}, version=Match.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        return False
+
+    # The row as the UPDATE left it, so the logged version is exact
+    db.execute(insert(ScoreEvent).from_select(
+        ["tournament_id", "match_id", "version", *SCORE_FIELDS, "user_id", "created_at"],
+        select(
+            Match.tournament_id, Match.id, Match.version,
+            *(getattr(Match, field) for field in SCORE_FIELDS),
+            literal(user_id, Integer), literal(datetime.utcnow(), DateTime),
+        ).where(Match.id == match_id),
+    ))
+    return True
@@ -9,6 +9,13 @@ def _get_bool(env_var: str, default: bool = False) -> bool:
     return value.lower() in {"1", "true", "yes", "on"}
 
 
+def _get_int(env_var: str, default: int) -> int:
+    value = os.getenv(env_var)
+    if value is None or not value.strip():
+        return default
+    return int(value)
+
+
 # Application environment
 DEBUG: bool = _get_bool("DEBUG", False)  # Set to False for production
 
@@ -16,6 +23,24 @@ DEBUG: bool = _get_bool("DEBUG", False)  # Set to False for production
 # Default: local SQLite file in project root, same as before
 DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./tournament.db")
 
+# SQLite tuning (ignored for other databases), applied to every new connection
+# "wal": WAL journal (readers and the writer don't block each other), synchronous=NORMAL,
+#        busy timeout, memory-mapped reads, larger page cache, temp tables in memory
+# "default": SQLite's own defaults (rollback journal, full sync); only foreign keys are enforced
+SQLITE_PROFILE: str = os.getenv("SQLITE_PROFILE", "wal").strip().lower()
+SQLITE_BUSY_TIMEOUT_MS: int = _get_int("SQLITE_BUSY_TIMEOUT_MS", 5000)
+SQLITE_MMAP_SIZE: int = _get_int("SQLITE_MMAP_SIZE", 64 * 1024 * 1024)  # bytes
+SQLITE_CACHE_SIZE_KB: int = _get_int("SQLITE_CACHE_SIZE_KB", 16 * 1024)  # per connection
+
+# Connection pool (per process); see GET /internal/metrics for checkout latency and overflow
+DB_POOL_SIZE: int = _get_int("DB_POOL_SIZE", 5)          # connections kept open
+DB_MAX_OVERFLOW: int = _get_int("DB_MAX_OVERFLOW", 10)   # extra connections opened under load, closed after use
+DB_POOL_TIMEOUT: int = _get_int("DB_POOL_TIMEOUT", 30)   # seconds to wait for a free connection
+# Server databases (PostgreSQL) only
+DB_POOL_RECYCLE: int = _get_int("DB_POOL_RECYCLE", 1800)  # seconds; replace connections before the server drops them
+DB_POOL_PRE_PING: bool = _get_bool("DB_POOL_PRE_PING", True)  # test connections on checkout
+DB_STATEMENT_TIMEOUT_MS: int = _get_int("DB_STATEMENT_TIMEOUT_MS", 30000)  # 0 = no limit
+
 # CORS configuration
 # Default: allow only local FastAPI origin; can be overridden with CORS_ORIGINS env
 _default_cors = "http://127.0.0.1:8000"
@@ -34,7 +59,29 @@ DEFAULT_ADMIN_USERNAME: str = os.getenv("DEFAULT_ADMIN_USERNAME", "admin")
 DEFAULT_ADMIN_PASSWORD: str = os.getenv("DEFAULT_ADMIN_PASSWORD", "")
 # If no password is set via env var, don't create default admin (security)
 
+# Verified access tokens are cached per process (see backend/auth_cache.py); 0 disables the cache.
+# Users deleted or deactivated from another process (the CLI) keep access for at most the TTL.
+AUTH_CACHE_TTL_SECONDS: int = _get_int("AUTH_CACHE_TTL_SECONDS", 60)
+AUTH_CACHE_SIZE: int = _get_int("AUTH_CACHE_SIZE", 1024)
+
+# Login: bcrypt runs on its own small thread pool; logins beyond the queue limit get 503
+PASSWORD_HASH_WORKERS: int = _get_int("PASSWORD_HASH_WORKERS", 2)
+PASSWORD_HASH_MAX_PENDING: int = _get_int("PASSWORD_HASH_MAX_PENDING", 32)
+# Sliding-window login throttling (429): all attempts per client address, failures per username
+LOGIN_WINDOW_SECONDS: int = _get_int("LOGIN_WINDOW_SECONDS", 60)
+LOGIN_MAX_ATTEMPTS_PER_IP: int = _get_int("LOGIN_MAX_ATTEMPTS_PER_IP", 30)
+LOGIN_MAX_FAILURES_PER_USERNAME: int = _get_int("LOGIN_MAX_FAILURES_PER_USERNAME", 10)
+
+# Idempotency-Key on score submission: responses are kept per process for retries
+IDEMPOTENCY_TTL_SECONDS: int = _get_int("IDEMPOTENCY_TTL_SECONDS", 24 * 3600)
+IDEMPOTENCY_MAX_KEYS: int = _get_int("IDEMPOTENCY_MAX_KEYS", 10000)
+
 # Supabase Storage configuration (for persistent sponsor logo storage)
 SUPABASE_URL: str = os.getenv("SUPABASE_URL", "").strip()
 SUPABASE_SERVICE_KEY: str = os.getenv("SUPABASE_SERVICE_KEY", "").strip()
 
+# Sponsor logo storage: "supabase" or "local"; default is Supabase when SUPABASE_URL is set
+STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "").strip().lower()
+LOCAL_STORAGE_DIR: str = os.getenv("LOCAL_STORAGE_DIR", "./media")  # served under /media
+STORAGE_TIMEOUT_SECONDS: int = _get_int("STORAGE_TIMEOUT_SECONDS", 30)
+STORAGE_MAX_RETRIES: int = _get_int("STORAGE_MAX_RETRIES", 2)
@@ -0,0 +1,234 @@
+"""
+In-process standings engine.
+
+Keeps the poule tables of every tournament in memory, so /standings can be
+served without re-querying and re-aggregating all poule matches. Score writes
+apply a delta (old set scores out, new set scores in). Changes to teams or
+poules drop the tournament's table, and the next read rebuilds it from the
+database.
+
+This is the single ranking service: poule standings, knockout seeding
+(get_team_by_rank) and the overall standings all read the same ordered table,
+which is sorted once per change and cached until the next one.
+"""
+import threading
+from sqlalchemy.orm import Session
+from backend.models import Poule, Team, Match
+
+
+def is_played(h1, a1, h2, a2) -> bool:
+    """A match counts once both sets have a score and neither set is 0-0 (0-0 means 'not played yet')."""
+    return (
+        h1 is not None and a1 is not None
+        and h2 is not None and a2 is not None
+        and not (h1 == 0 and a1 == 0)
+        and not (h2 == 0 and a2 == 0)
+    )
+
+
+UNPLAYED = (None, None, None, None)
+
+
+def match_scores(m):
+    return (m.home_set1_score, m.away_set1_score, m.home_set2_score, m.away_set2_score)
+
+
+class _Row:
+    __slots__ = ("id", "name", "poule_id", "points", "points_for", "points_against", "played")
+
+    def __init__(self, team_id, name, poule_id):
+        self.id = team_id
+        self.name = name
+        self.poule_id = poule_id
+        self.points = 0
+        self.points_for = 0
+        self.points_against = 0
+        self.played = 0
+
+    def as_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "points": self.points,
+            "points_for": self.points_for,
+            "points_against": self.points_against,
+            "balance": self.points_for - self.points_against,
+            "played": self.played,
+        }
+
+
+class _TournamentTable:
+    def __init__(self):
+        self.poules = []    # [(poule_id, name, [team_id, ...])] in display order
+        self.rows = {}      # team_id -> _Row
+        self.matches = {}   # match_id -> (poule_id, home_id, away_id, scores, version) as last applied
+        self._ordered = None  # cached snapshot of all poules; reset on every change
+
+    def _apply(self, poule_id, home_id, away_id, scores, sign):
+        """Add (sign=1) or remove (sign=-1) the contribution of one played match."""
+        home = self.rows.get(home_id)
+        away = self.rows.get(away_id)
+        if not home or not away or home.poule_id != poule_id or away.poule_id != poule_id:
+            return
+        h1, a1, h2, a2 = scores
+        for h, a in ((h1, a1), (h2, a2)):
+            home.points_for += sign * h
+            home.points_against += sign * a
+            away.points_for += sign * a
+            away.points_against += sign * h
+            if h > a:
+                home.points += sign * 2
+            elif a > h:
+                away.points += sign * 2
+            else:
+                home.points += sign
+                away.points += sign
+        home.played += sign
+        away.played += sign
+
+    def set_match(self, match_id, poule_id, home_id, away_id, scores, version=0):
+        old = self.matches.get(match_id)
+        if old and old[1] and old[2] and is_played(*old[3]):
+            self._apply(old[0], old[1], old[2], old[3], -1)
+        self.matches[match_id] = (poule_id, home_id, away_id, scores, version)
+        if home_id and away_id and is_played(*scores):
+            self._apply(poule_id, home_id, away_id, scores, 1)
+        self._ordered = None
+
+    def snapshot(self, only_poule_id=None):
+        """Ordered poule tables. Shared between callers until the next change: treat as read-only."""
+        if self._ordered is None:
+            ordered = []
+            for poule_id, name, team_ids in self.poules:
+                rows = [self.rows[tid] for tid in team_ids]
+                # Stable sort: ties keep team id order, same as before
+                rows.sort(key=lambda r: (r.points, r.points_for - r.points_against), reverse=True)
+                ordered.append({
+                    "id": poule_id,
+                    "name": name,
+                    "teams": [r.as_dict() for r in rows],
+                })
+            self._ordered = ordered
+        if only_poule_id is None:
+            return self._ordered
+        return [poule for poule in self._ordered if poule["id"] == only_poule_id]
+
+
+class StandingsEngine:
+    """Per-tournament poule standings, updated incrementally on score writes."""
+
+    def __init__(self):
+        self._tables = {}
+        self._generation = {}  # tournament_id -> bumped whenever a write can't be applied to the cache
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _load(db: Session, tournament_id: int, scores=None) -> _TournamentTable:
+        table = _TournamentTable()
+        poules = (
+            db.query(Poule.id, Poule.name)
+            .filter(Poule.tournament_id == tournament_id)
+            .order_by(Poule.id)
+            .all()
+        )
+        members = {pid: [] for pid, _ in poules}
+        teams = (
+            db.query(Team.id, Team.name, Team.poule_id)
+            .filter(Team.tournament_id == tournament_id, Team.poule_id.isnot(None))
+            .order_by(Team.id)
+            .all()
+        )
+        for tid, name, poule_id in teams:
+            if poule_id in members:
+                members[poule_id].append(tid)
+                table.rows[tid] = _Row(tid, name, poule_id)
+        table.poules = [(pid, name, members[pid]) for pid, name in poules]
+
+        matches = (
+            db.query(
+                Match.id, Match.poule_id, Match.home_team_id, Match.away_team_id,
+                Match.home_set1_score, Match.away_set1_score,
+                Match.home_set2_score, Match.away_set2_score, Match.version,
+            )
+            .filter(Match.tournament_id == tournament_id, Match.poule_id.isnot(None))
+            .all()
+        )
+        for mid, poule_id, home_id, away_id, h1, a1, h2, a2, version in matches:
+            if scores is not None:
+                h1, a1, h2, a2 = scores.get(mid, UNPLAYED)
+            table.set_match(mid, poule_id, home_id, away_id, (h1, a1, h2, a2), version)
+        return table
+
+    def get(self, db: Session, tournament_id: int, poule_id=None):
+        """Poule standings for a tournament (or a single poule), rebuilt from the database if not cached."""
+        with self._lock:
+            table = self._tables.get(tournament_id)
+            if table is not None:
+                return table.snapshot(poule_id)
+            generation = self._generation.get(tournament_id, 0)
+        table = self._load(db, tournament_id)
+        with self._lock:
+            # Only cache the table if no write slipped in while it was loading
+            if self._generation.get(tournament_id, 0) == generation:
+                table = self._tables.setdefault(tournament_id, table)
+            return table.snapshot(poule_id)
+
+    def replayed(self, db: Session, tournament_id: int, scores, poule_id=None):
+        """Poule standings with {match_id: set scores} instead of the stored scores; never cached."""
+        return self._load(db, tournament_id, scores).snapshot(poule_id)
+
+    def rankings(self, db: Session, tournament_id: int):
+        """{poule_id: [team_id, ...]} in rank order."""
+        return {poule["id"]: [row["id"] for row in poule["teams"]] for poule in self.get(db, tournament_id)}
+
+    def team_rows(self, db: Session, tournament_id: int):
+        """{team_id: standings row} for every team in a poule."""
+        return {row["id"]: row for poule in self.get(db, tournament_id) for row in poule["teams"]}
+
+    def apply_match(self, match: Match):
+        """
+        Apply a (committed) score change of a single match to the cached table.
+        Concurrent writers can get here out of order; a change at or below the
+        version the table already holds for the match is stale and skipped.
+        """
+        if match.poule_id is None:
+            return  # knockout/final matches don't count for poule standings
+        with self._lock:
+            table = self._tables.get(match.tournament_id)
+            if table is None or match.id not in table.matches:
+                # Not cached, or the cached table predates this match: rebuild on next read
+                self._drop(match.tournament_id)
+                return
+            if match.version <= table.matches[match.id][4]:
+                return
+            table.set_match(match.id, match.poule_id, match.home_team_id, match.away_team_id,
+                            match_scores(match), match.version)
+
+    def _drop(self, tournament_id: int):
+        self._tables.pop(tournament_id, None)
+        self._generation[tournament_id] = self._generation.get(tournament_id, 0) + 1
+
+    def invalidate(self, tournament_id: int):
+        with self._lock:
+            self._drop(tournament_id)
+
+    def rebuild(self, db: Session, tournament_id: int) -> bool:
+        """
+        Rebuild a tournament's table from the database and swap it in.
+        Returns True if the cached table (if any) matched the fresh one.
+        """
+        with self._lock:
+            # Taken out first, so a write during the load drops the fresh table too
+            cached = self._tables.get(tournament_id)
+            self._drop(tournament_id)
+            generation = self._generation[tournament_id]
+        fresh = self._load(db, tournament_id)
+        with self._lock:
+            consistent = cached is None or cached.snapshot() == fresh.snapshot()
+            # Only cache the table if no write slipped in while it was loading
+            if self._generation.get(tournament_id, 0) == generation:
+                self._tables.setdefault(tournament_id, fresh)
+        return consistent
+
+
+standings_engine = StandingsEngine()
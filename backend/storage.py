@@ -0,0 +1,185 @@
+"""
+Sponsor logo storage.
+
+Two interchangeable backends behind the same small async interface:
+- SupabaseStorage: the "sponsors" bucket of Supabase Storage, through one shared
+  pooled httpx.AsyncClient with timeouts. Uploads stream the file in chunks
+  instead of reading it into memory; failed requests (connection errors,
+  timeouts, 429 and 5xx) are retried with backoff, re-reading the file from
+  the start.
+- LocalStorage: files in a local directory, served by the app under /media.
+  For development and tests without Supabase credentials.
+
+Uploads are read from an UploadFile-like object: `await read(size)` and
+`await seek(0)`. STORAGE_BACKEND picks the backend; by default Supabase when
+SUPABASE_URL is set, the local directory otherwise.
+"""
+import asyncio
+import io
+import os
+from typing import Optional
+
+import httpx
+from starlette.concurrency import run_in_threadpool
+
+from backend.settings import (
+    LOCAL_STORAGE_DIR,
+    STORAGE_BACKEND,
+    STORAGE_MAX_RETRIES,
+    STORAGE_TIMEOUT_SECONDS,
+    SUPABASE_SERVICE_KEY,
+    SUPABASE_URL,
+)
+
+CHUNK_SIZE = 64 * 1024
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+LOCAL_URL_PREFIX = "/media/"
+
+
+class StorageError(Exception):
+    pass
+
+
+class BytesSource:
+    """An in-memory file to save, e.g. a generated image."""
+
+    def __init__(self, data: bytes):
+        self._buffer = io.BytesIO(data)
+        self.size = len(data)
+
+    async def read(self, size: int = -1) -> bytes:
+        return self._buffer.read(size)
+
+    async def seek(self, offset: int):
+        self._buffer.seek(offset)
+
+
+async def _chunks(source):
+    while True:
+        chunk = await source.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        yield chunk
+
+
+class SupabaseStorage:
+    def __init__(self, base_url: str, service_key: str, bucket: str = "sponsors",
+                 timeout: float = STORAGE_TIMEOUT_SECONDS, max_retries: int = STORAGE_MAX_RETRIES):
+        self.base_url = base_url
+        self.service_key = service_key
+        self.bucket = bucket
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.public_prefix = f"/storage/v1/object/public/{bucket}/"
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Created on first use, so it binds to the running event loop
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+                headers={"Authorization": f"Bearer {self.service_key}"},
+            )
+        return self._client
+
+    def _object_url(self, path: str) -> str:
+        return f"{self.base_url}/storage/v1/object/{self.bucket}/{path}"
+
+    async def _request(self, method: str, path: str, source=None, headers=None) -> httpx.Response:
+        for attempt in range(self.max_retries + 1):
+            if source is not None:
+                await source.seek(0)
+            try:
+                response = await self.client.request(
+                    method, self._object_url(path), headers=headers,
+                    content=_chunks(source) if source is not None else None,
+                )
+            except httpx.TransportError as e:
+                if attempt == self.max_retries:
+                    raise StorageError(str(e) or type(e).__name__)
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    return response
+            await asyncio.sleep(0.5 * 2 ** attempt)
+
+    async def save(self, path: str, source, content_type: str, size: Optional[int] = None) -> str:
+        """Upload a file and return its public URL."""
+        headers = {"Content-Type": content_type, "x-upsert": "true"}
+        if size is not None:
+            headers["Content-Length"] = str(size)  # otherwise the body is sent chunked
+        response = await self._request("PUT", path, source=source, headers=headers)
+        if response.status_code not in (200, 201):
+            raise StorageError(response.text)
+        return f"{self.base_url}{self.public_prefix}{path}"
+
+    def path_from_url(self, url: str) -> Optional[str]:
+        """Storage path of a public URL of this bucket, None for anything else."""
+        if url and self.public_prefix in url:
+            return url.split(self.public_prefix)[-1]
+        return None
+
+    async def delete(self, path: str):
+        # Missing objects are fine; anything else that didn't succeed is an error
+        response = await self._request("DELETE", path)
+        if response.status_code == 404 or response.is_success:
+            return
+        if response.status_code == 400 and '"404"' in response.text:
+            return  # older storage versions report a missing object as 400 with statusCode "404"
+        raise StorageError(response.text or f"HTTP {response.status_code}")
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class LocalStorage:
+    def __init__(self, root: str = LOCAL_STORAGE_DIR, url_prefix: str = LOCAL_URL_PREFIX):
+        self.root = os.path.abspath(root)
+        self.url_prefix = url_prefix
+
+    def _file(self, path: str) -> str:
+        full = os.path.abspath(os.path.join(self.root, path))
+        if not full.startswith(self.root + os.sep):
+            raise StorageError(f"Invalid storage path: {path}")
+        return full
+
+    async def save(self, path: str, source, content_type: str, size: Optional[int] = None) -> str:
+        full = self._file(path)
+        await run_in_threadpool(os.makedirs, os.path.dirname(full), exist_ok=True)
+        await source.seek(0)
+        handle = await run_in_threadpool(open, full, "wb")
+        try:
+            async for chunk in _chunks(source):
+                await run_in_threadpool(handle.write, chunk)
+        finally:
+            await run_in_threadpool(handle.close)
+        return f"{self.url_prefix}{path}"
+
+    def path_from_url(self, url: str) -> Optional[str]:
+        if url and url.startswith(self.url_prefix):
+            return url[len(self.url_prefix):]
+        return None
+
+    async def delete(self, path: str):
+        try:
+            await run_in_threadpool(os.remove, self._file(path))
+        except FileNotFoundError:
+            pass
+
+    async def aclose(self):
+        pass
+
+
+def storage_from_settings():
+    backend = STORAGE_BACKEND or ("supabase" if SUPABASE_URL else "local")
+    if backend == "supabase":
+        return SupabaseStorage(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+    if backend == "local":
+        return LocalStorage()
+    raise ValueError(f"Unknown STORAGE_BACKEND {backend!r}, expected 'supabase' or 'local'")
+
+
+sponsor_storage = storage_from_settings()
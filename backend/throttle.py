@@ -0,0 +1,83 @@
+"""
+In-memory sliding-window limits for login attempts.
+
+Every login costs a bcrypt hash, so bursts are turned away with 429 before
+any hashing happens: per client address every attempt counts (generous, since
+volunteers at a venue share one address), per username only failed attempts
+count (successful logins never lock anyone out). Windows live in process
+memory and are bounded in the number of keys they track.
+
+Behind a hosting proxy the client address is only the user's if uvicorn takes
+it from X-Forwarded-For (--proxy-headers --forwarded-allow-ips, as in the
+Procfile); otherwise every user shares the proxy's address and its window.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+
+from backend.settings import (
+    LOGIN_MAX_ATTEMPTS_PER_IP,
+    LOGIN_MAX_FAILURES_PER_USERNAME,
+    LOGIN_WINDOW_SECONDS,
+)
+
+MAX_KEYS = 10000
+
+
+class SlidingWindowLimiter:
+    def __init__(self, limit: int, window_seconds: float, max_keys: int = MAX_KEYS):
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.max_keys = max_keys
+        self._hits = OrderedDict()  # key -> deque of monotonic timestamps, least recently hit first
+        self._lock = threading.Lock()
+        self.blocked = 0
+
+    def _prune(self, key, now: float):
+        hits = self._hits.get(key)
+        if hits is None:
+            return None
+        while hits and hits[0] <= now - self.window_seconds:
+            hits.popleft()
+        if not hits:
+            del self._hits[key]
+            return None
+        return hits
+
+    def retry_after(self, key) -> float:
+        """0 if another attempt is allowed now, otherwise seconds until one is."""
+        now = time.monotonic()
+        with self._lock:
+            hits = self._prune(key, now)
+            if hits is None or len(hits) < self.limit:
+                return 0.0
+            self.blocked += 1
+            return hits[-self.limit] + self.window_seconds - now
+
+    def hit(self, key):
+        now = time.monotonic()
+        with self._lock:
+            hits = self._prune(key, now)
+            if hits is None:
+                hits = self._hits[key] = deque()
+            hits.append(now)
+            self._hits.move_to_end(key)
+            while len(self._hits) > self.max_keys:
+                self._hits.popitem(last=False)
+
+    def reset(self, key):
+        with self._lock:
+            self._hits.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "window_seconds": self.window_seconds,
+                "tracked_keys": len(self._hits),
+                "blocked": self.blocked,
+            }
+
+
+login_ip_limiter = SlidingWindowLimiter(LOGIN_MAX_ATTEMPTS_PER_IP, LOGIN_WINDOW_SECONDS)
+login_failure_limiter = SlidingWindowLimiter(LOGIN_MAX_FAILURES_PER_USERNAME, LOGIN_WINDOW_SECONDS)
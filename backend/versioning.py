@@ -0,0 +1,39 @@
+"""
+Per-tournament data versions, exposed as ETags on the public read endpoints.
+
+Every write that changes what a tournament's public screens show bumps its
+version. Repeat requests carrying a matching If-None-Match are answered with
+304 before the database is touched.
+
+Versions live in process memory (the app runs as a single uvicorn process);
+the boot id in the ETag makes sure tags from before a restart never match.
+"""
+import threading
+import uuid
+
+_BOOT_ID = uuid.uuid4().hex[:8]
+
+_versions = {}
+_lock = threading.Lock()
+
+
+def bump(tournament_id: int) -> int:
+    with _lock:
+        _versions[tournament_id] = _versions.get(tournament_id, 0) + 1
+        return _versions[tournament_id]
+
+
+def current(tournament_id: int) -> int:
+    return _versions.get(tournament_id, 0)
+
+
+def etag(tournament_id: int, resource: str) -> str:
+    return f'W/"{_BOOT_ID}-{resource}-{tournament_id}-{current(tournament_id)}"'
+
+
+def matches(if_none_match, tag: str) -> bool:
+    """True if an If-None-Match header value contains the given tag (or '*')."""
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidates or tag in candidates
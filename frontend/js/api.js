@@ -24,7 +24,12 @@ async function parseError(res) {
     const text = await res.text();
     try {
         const json = JSON.parse(text);
-        return json.detail || json.message || text;
+        const detail = json.detail;
+        if (detail && typeof detail === "object") {
+            // {message, ...} from our own errors, a list of field errors from validation
+            return detail.message || (Array.isArray(detail) ? detail.map(d => d.msg).join("; ") : text);
+        }
+        return detail || json.message || text;
     } catch {
         return text || `HTTP ${res.status}`;
     }
@@ -61,6 +66,43 @@ async function apiPost(path, data) {
     return res.json();
 }
 
+function newIdempotencyKey() {
+    if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+    return `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+}
+
+// POST that is safe to resend: the server runs it once per Idempotency-Key,
+// so network failures (flaky venue Wi-Fi) are retried with the same key.
+async function apiPostIdempotent(path, data, attempts = 3) {
+    const headers = { ...getAuthHeaders(), "Idempotency-Key": newIdempotencyKey() };
+    for (let attempt = 1; ; attempt++) {
+        let res;
+        try {
+            res = await fetch(`${API_BASE}${path}`, {
+                method: "POST",
+                headers,
+                body: JSON.stringify(data)
+            });
+        } catch (err) {
+            if (attempt >= attempts) throw err;
+            await new Promise(resolve => setTimeout(resolve, 500 * attempt));
+            continue;
+        }
+        if (res.status === 401) { handleUnauthorized(); return; }
+        if (res.status === 409 && res.headers.get("Retry-After") && attempt < attempts) {
+            // The first attempt is still being processed
+            await new Promise(resolve => setTimeout(resolve, 1000));
+            continue;
+        }
+        if (!res.ok) {
+            const err = new Error(await parseError(res));
+            err.status = res.status;
+            throw err;
+        }
+        return res.json();
+    }
+}
+
 async function apiDelete(path) {
     const res = await fetch(`${API_BASE}${path}`, {
         method: "DELETE",
@@ -86,3 +128,15 @@ async function apiPut(path, data) {
     }
     return res.json();
 }
+
+// Live tournament feed (Server-Sent Events). `handlers` maps event names
+// ("score", "schedule", "resync") to callbacks receiving the parsed data.
+// Returns the EventSource, or null if the browser doesn't support it.
+function subscribeTournamentEvents(tournamentId, handlers) {
+    if (!window.EventSource || !tournamentId) return null;
+    const source = new EventSource(`${API_BASE}/tournaments/${tournamentId}/events`);
+    Object.entries(handlers).forEach(([name, handler]) => {
+        source.addEventListener(name, (e) => handler(JSON.parse(e.data || "{}")));
+    });
+    return source;
+}
@@ -540,7 +540,7 @@ document.addEventListener("DOMContentLoaded", async () => {
                 const row = document.createElement("div");
                 row.className = "sponsor-manage-row";
                 row.innerHTML = `
-                    <img src="${s.logo_url}" alt="${s.name || ''}" class="sponsor-thumb" />
+                    <img src="${s.logo_url}"${s.srcset ? ` srcset="${s.srcset}" sizes="80px"` : ""} alt="${s.name || ''}" class="sponsor-thumb" />
                     <span class="sponsor-manage-name">${s.name || "—"}</span>
                     <span class="sponsor-manage-url">${s.url ? `<a href="${s.url}" target="_blank">${s.url}</a>` : "—"}</span>
                     <button class="delete-sponsor danger">Verwijder</button>
@@ -608,6 +608,12 @@ document.addEventListener("DOMContentLoaded", async () => {
     updatePhaseButtons();
     loadSponsors();
 
-    // Refresh phase status every 5 seconds to update buttons
-    setInterval(updatePhaseButtons, 5000);
+    // Update buttons when scores or phases change (live feed), with a slow
+    // fallback poll for browsers/proxies without Server-Sent Events
+    const events = subscribeTournamentEvents(tournamentId, {
+        score: updatePhaseButtons,
+        schedule: updatePhaseButtons,
+        resync: updatePhaseButtons,
+    });
+    setInterval(updatePhaseButtons, events ? 60000 : 5000);
 });
@@ -88,6 +88,24 @@ document.addEventListener("DOMContentLoaded", () => {
 
     loadSchedule();
     loadSponsors();
+
+    // Live updates: patch scores in place, reload the visible view when the schedule changes
+    function reloadVisible() {
+        if (!scheduleContainer.classList.contains("hidden")) loadSchedule();
+        if (!standingsContainer.classList.contains("hidden")) loadStandings();
+        if (!overallContainer.classList.contains("hidden")) loadOverallStandings();
+    }
+    subscribeTournamentEvents(tournamentId, {
+        score: (data) => {
+            if (!updateMatchScore(data.match) && !scheduleContainer.classList.contains("hidden")) {
+                loadSchedule();
+            }
+            if (!standingsContainer.classList.contains("hidden")) loadStandings();
+            if (!overallContainer.classList.contains("hidden")) loadOverallStandings();
+        },
+        schedule: reloadVisible,
+        resync: reloadVisible,
+    });
 });
 
 async function loadSponsors() {
@@ -98,15 +116,17 @@ async function loadSponsors() {
         const sponsors = await apiGet(`/tournaments/${tournamentId}/sponsors`);
         if (!sponsors || sponsors.length === 0) return;
 
+        const compact = window.innerWidth <= 1024;
+
         // Preload all images before rendering so layout is stable from the start
         await Promise.all(sponsors.map(s => new Promise(resolve => {
             const img = new Image();
             img.onload = resolve;
             img.onerror = resolve;
-            img.src = s.logo_url;
+            setSponsorSource(img, s, compact ? 80 : 96);
         })));
 
-        if (window.innerWidth <= 1024) {
+        if (compact) {
             buildSponsorGrid(carousel, sponsors);
         } else {
             buildSponsorScroll(carousel, sponsors);
@@ -118,10 +138,27 @@ async function loadSponsors() {
     }
 }
 
+// Logos are shown at a fixed height; with the original's dimensions the browser
+// can pick the smallest resized WebP variant from srcset instead of the full upload
+function sponsorSizes(s, height) {
+    return `${Math.ceil(height * s.logo_width / s.logo_height)}px`;
+}
+
+function setSponsorSource(img, s, height) {
+    if (s.srcset && s.logo_width && s.logo_height) {
+        img.sizes = sponsorSizes(s, height);
+        img.srcset = s.srcset;
+    }
+    img.src = s.logo_url;
+}
+
 function buildSponsorScroll(carousel, sponsors) {
     function buildItems() {
         return sponsors.map(s => {
-            const img = `<img src="${s.logo_url}" alt="${s.name || 'sponsor'}" />`;
+            const variants = s.srcset && s.logo_width && s.logo_height
+                ? ` srcset="${s.srcset}" sizes="${sponsorSizes(s, 96)}"`
+                : "";
+            const img = `<img src="${s.logo_url}"${variants} alt="${s.name || 'sponsor'}" />`;
             return s.url
                 ? `<a href="${s.url}" target="_blank" rel="noopener noreferrer">${img}</a>`
                 : img;
@@ -209,7 +246,7 @@ function buildSponsorGrid(carousel, sponsors) {
         grid.className = "sponsor-page";
         page.forEach(s => {
             const img = document.createElement("img");
-            img.src = s.logo_url;
+            setSponsorSource(img, s, 80);
             img.alt = s.name || "sponsor";
             if (s.url) {
                 const a = document.createElement("a");
@@ -259,6 +296,41 @@ function buildSponsorGrid(carousel, sponsors) {
     startTimer();
 }
 
+// Format set scores with highlighting for winners
+function formatSetScore(homeScore, awayScore) {
+    if (homeScore == null || awayScore == null) {
+        return { html: "-", homeClass: "", awayClass: "" };
+    }
+
+    const homeWins = homeScore > awayScore;
+    const awayWins = awayScore > homeScore;
+
+    const homeClass = homeWins ? "score-winner" : "";
+    const awayClass = awayWins ? "score-winner" : "";
+
+    return {
+        html: `<span class="${homeClass}">${homeScore}</span>-<span class="${awayClass}">${awayScore}</span>`,
+        homeClass,
+        awayClass
+    };
+}
+
+function placeholderName(rankPosition, rankPoule, winnerOf, fallback) {
+    if (rankPosition && rankPoule) return `#${rankPosition} poule ${rankPoule.name}`;
+    if (winnerOf) return `Winnaar ronde ${winnerOf.round_number} veld ${winnerOf.field_number}`;
+    return fallback;
+}
+
+// Patch a single match row in place from a live "score" event
+function updateMatchScore(m) {
+    const tr = document.querySelector(`#schedule-container tr[data-match-id="${m.id}"]`);
+    if (!tr) return false;
+    const cells = tr.querySelectorAll(".score-cell");
+    cells[0].innerHTML = formatSetScore(m.home_set1_score, m.away_set1_score).html;
+    cells[1].innerHTML = formatSetScore(m.home_set2_score, m.away_set2_score).html;
+    return true;
+}
+
 async function loadSchedule() {
     const container = document.getElementById("schedule-container");
     container.innerHTML = "";
@@ -307,43 +379,21 @@ async function loadSchedule() {
         rnd.matches.forEach(m => {
             const home =
                 m.home_team?.name ??
-                (m.home_rank_position && m.home_rank_poule
-                    ? `#${m.home_rank_position} poule ${m.home_rank_poule.name}`
-                    : "Finalist 1");
+                placeholderName(m.home_rank_position, m.home_rank_poule, m.home_winner_of, "Finalist 1");
 
             const away =
                 m.away_team?.name ??
-                (m.away_rank_position && m.away_rank_poule
-                    ? `#${m.away_rank_position} poule ${m.away_rank_poule.name}`
-                    : "Finalist 2");
+                placeholderName(m.away_rank_position, m.away_rank_poule, m.away_winner_of, "Finalist 2");
 
 
             const referee =
                 m.referee_team?.name ?? "Geen scoreteam toegewezen";
 
-            // Format set scores with highlighting for winners
-            function formatSetScore(homeScore, awayScore) {
-                if (homeScore == null || awayScore == null) {
-                    return { html: "-", homeClass: "", awayClass: "" };
-                }
-                
-                const homeWins = homeScore > awayScore;
-                const awayWins = awayScore > homeScore;
-                
-                const homeClass = homeWins ? "score-winner" : "";
-                const awayClass = awayWins ? "score-winner" : "";
-                
-                return {
-                    html: `<span class="${homeClass}">${homeScore}</span>-<span class="${awayClass}">${awayScore}</span>`,
-                    homeClass,
-                    awayClass
-                };
-            }
-            
             const set1Data = formatSetScore(m.home_set1_score, m.away_set1_score);
             const set2Data = formatSetScore(m.home_set2_score, m.away_set2_score);
 
             const tr = document.createElement("tr");
+            tr.dataset.matchId = m.id;
             tr.innerHTML = `
                 <td>${m.field_number}</td>
                 <td>${home}</td>
@@ -1,6 +1,7 @@
 const urlParams = new URLSearchParams(window.location.search);
 const tournamentId = urlParams.get("tournament");
 let allRounds = [];
+const matchVersions = {}; // match id -> score version as loaded, sent back on save
 let currentPhase = "group"; // Will be determined dynamically
 
 document.addEventListener("DOMContentLoaded", () => {
@@ -116,13 +117,16 @@ async function loadMatches() {
         const ul = document.createElement("ul");
 
         rnd.matches.forEach(m => {
+            matchVersions[m.id] = m.version;
             const home =
                 m.home_team?.name ??
-                (m.home_rank_position ? `#${m.home_rank_position}` : "—");
+                (m.home_rank_position ? `#${m.home_rank_position}`
+                    : m.home_winner_of ? `Winnaar R${m.home_winner_of.round_number} V${m.home_winner_of.field_number}` : "—");
 
             const away =
                 m.away_team?.name ??
-                (m.away_rank_position ? `#${m.away_rank_position}` : "—");
+                (m.away_rank_position ? `#${m.away_rank_position}`
+                    : m.away_winner_of ? `Winnaar R${m.away_winner_of.round_number} V${m.away_winner_of.field_number}` : "—");
 
                 const homeSet1 = m.home_set1_score ?? "";
                 const awaySet1 = m.away_set1_score ?? "";
@@ -161,6 +165,12 @@ async function loadMatches() {
         });
 
         roundDiv.appendChild(ul);
+
+        const saveRoundButton = document.createElement("button");
+        saveRoundButton.textContent = "Ronde opslaan";
+        saveRoundButton.addEventListener("click", () => submitRound(rnd));
+        roundDiv.appendChild(saveRoundButton);
+
         container.appendChild(roundDiv);
     });
     } catch (err) {
@@ -168,22 +178,70 @@ async function loadMatches() {
     }
 }
 
+function readScore(matchId) {
+    const read = prefix => parseInt(document.getElementById(`${prefix}-${matchId}`).value);
+    return {
+        home_set1_score: read("home1"),
+        away_set1_score: read("away1"),
+        home_set2_score: read("home2"),
+        away_set2_score: read("away2")
+    };
+}
+
 async function submitScore(matchId) {
-    const homeSet1 = parseInt(document.getElementById(`home1-${matchId}`).value) || 0;
-    const awaySet1 = parseInt(document.getElementById(`away1-${matchId}`).value) || 0;
-    const homeSet2 = parseInt(document.getElementById(`home2-${matchId}`).value) || 0;
-    const awaySet2 = parseInt(document.getElementById(`away2-${matchId}`).value) || 0;
+    const score = readScore(matchId);
 
     try {
-        await apiPost(`/matches/${matchId}/score`, {
-            home_set1_score: isNaN(homeSet1) ? null : homeSet1,
-            away_set1_score: isNaN(awaySet1) ? null : awaySet1,
-            home_set2_score: isNaN(homeSet2) ? null : homeSet2,
-            away_set2_score: isNaN(awaySet2) ? null : awaySet2
+        await apiPostIdempotent(`/matches/${matchId}/score`, {
+            home_set1_score: score.home_set1_score || 0,
+            away_set1_score: score.away_set1_score || 0,
+            home_set2_score: score.home_set2_score || 0,
+            away_set2_score: score.away_set2_score || 0,
+            version: matchVersions[matchId]
         });
         alert("Score opgeslagen!");
         loadMatches(); // refresh
     } catch (err) {
-        alert("Fout bij opslaan score: " + err.message);
+        reportSaveError("Fout bij opslaan score", err);
+    }
+}
+
+async function submitRound(rnd) {
+    // Every match of the round with at least one filled in score, saved in one request
+    const scores = [];
+    rnd.matches.forEach(m => {
+        const score = readScore(m.id);
+        if (Object.values(score).every(isNaN)) return;
+        scores.push({
+            match_id: m.id,
+            home_set1_score: score.home_set1_score || 0,
+            away_set1_score: score.away_set1_score || 0,
+            home_set2_score: score.home_set2_score || 0,
+            away_set2_score: score.away_set2_score || 0,
+            version: matchVersions[m.id]
+        });
+    });
+    if (scores.length === 0) {
+        alert("Geen scores ingevuld in deze ronde.");
+        return;
+    }
+
+    try {
+        const result = await apiPostIdempotent(`/tournaments/${tournamentId}/scores`, { scores });
+        const updated = result.results.filter(r => r.status === "updated").length;
+        alert(`Ronde opgeslagen! ${updated} van ${scores.length} wedstrijden gewijzigd.`);
+        loadMatches(); // refresh
+    } catch (err) {
+        reportSaveError("Fout bij opslaan ronde", err);
+    }
+}
+
+function reportSaveError(prefix, err) {
+    if (err.status === 409) {
+        // Someone else saved a score in the meantime: show theirs before overwriting it
+        alert(`${prefix}: ${err.message}. De wedstrijden worden opnieuw geladen.`);
+        loadMatches();
+        return;
     }
+    alert(`${prefix}: ${err.message}`);
 }